@@ -7,26 +7,27 @@ import subprocess
 import os 
 import logging
 import psycopg2
+import psycopg2.errors
 import json
+import re
 from urllib.parse import quote
 from psycopg2 import sql, IntegrityError, ProgrammingError
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from pathlib import Path
 from dotenv import load_dotenv
 from telegram import (
-    Update, InlineKeyboardButton, InlineKeyboardMarkup, ForceReply, 
+    Update, InlineKeyboardButton, InlineKeyboardMarkup,
     ReplyKeyboardMarkup, KeyboardButton
 )
 from telegram.ext import (
-    Application, CommandHandler, CallbackQueryHandler,
+    AIORateLimiter, Application, CommandHandler, CallbackQueryHandler,
     MessageHandler, filters, ContextTypes
 )
-from telegram.helpers import escape_markdown
 from telegram.constants import ParseMode
 from telegram.error import BadRequest
 import threading
 from flask import Flask, jsonify, request, redirect, render_template_string 
-from contextlib import closing
+from contextlib import closing, asynccontextmanager
 from datetime import datetime, timedelta, timezone
 import random
 import time
@@ -34,6 +35,24 @@ import asyncio
 from typing import Optional
 import signal
 import sys
+import functools
+import contextvars
+import hmac
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+
+# Load environment variables first
+load_dotenv()
+
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=os.getenv('LOG_LEVEL', 'INFO').upper()
+)
+logger = logging.getLogger(__name__) 
+# Werkzeug logs a line per request; health checks and pings would otherwise keep the Flask
+# thread formatting and writing logs (holding the GIL) alongside the bot's event loop
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
@@ -45,7 +64,7 @@ def signal_handler(signum, frame):
             db_pool.closeall()
             logger.info("✅ Database connections closed")
         except Exception as e:
-            logger.error(f"Error closing database pool: {e}")
+            logger.error("Error closing database pool: %s", e)
     
     logger.info("👋 Bot shutdown complete")
     sys.exit(0)
@@ -54,24 +73,220 @@ def signal_handler(signum, frame):
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
-# Load environment variables first
-load_dotenv()
-
 # Initialize database connection
 DATABASE_URL = os.getenv("DATABASE_URL")
 TOKEN = os.getenv('TOKEN')
 CHANNEL_ID = int(os.getenv('CHANNEL_ID', 0))
 BOT_USERNAME = os.getenv('BOT_USERNAME')
-ADMIN_ID = os.getenv('ADMIN_ID')
+# Shared secret for operator-only HTTP endpoints (/pool-stats); unset disables them
+ADMIN_SECRET = os.getenv('ADMIN_SECRET')
+# Parsed once so admin checks are an int set lookup instead of str() comparisons.
+# ADMIN_IDS takes a comma-separated list; a single ADMIN_ID is still accepted.
+ADMIN_IDS = frozenset(
+    int(x) for x in (os.getenv('ADMIN_IDS') or os.getenv('ADMIN_ID') or '').split(',')
+    if x.strip().lstrip('-').isdigit()
+)
 # Validate required environment variables
 required_vars = ['TOKEN', 'DATABASE_URL', 'CHANNEL_ID', 'BOT_USERNAME']
 missing_vars = [var for var in required_vars if not os.getenv(var)]
 
 if missing_vars:
-    logger.error(f"❌ Missing required environment variables: {missing_vars}")
+    logger.error("❌ Missing required environment variables: %s", missing_vars)
     logger.error("Please set these in Railway dashboard → Variables")
     # Don't exit immediately - let it fail gracefully for Railway health checks
 
+# Bump SCHEMA_VERSION whenever SCHEMA_DDL changes so init_db re-applies it on the next start
+SCHEMA_VERSION = 8
+
+# Contribution points per user (approved posts + comments), recounted from scratch: each table is
+# aggregated once with GROUP BY and joined back. Used to backfill users.contribution_count.
+USER_TOTALS_SQL = '''
+    SELECT u.user_id, u.anonymous_name, u.sex,
+           COALESCE(p.cnt, 0) + COALESCE(c.cnt, 0) AS total
+    FROM users u
+    LEFT JOIN (SELECT author_id, COUNT(*) AS cnt FROM posts WHERE approved = TRUE GROUP BY author_id) p
+           ON p.author_id = u.user_id
+    LEFT JOIN (SELECT author_id, COUNT(*) AS cnt FROM comments GROUP BY author_id) c
+           ON c.author_id = u.user_id
+'''
+
+SCHEMA_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        anonymous_name TEXT,
+        sex TEXT DEFAULT '👤',
+        awaiting_name BOOLEAN DEFAULT FALSE,
+        waiting_for_post BOOLEAN DEFAULT FALSE,
+        waiting_for_comment BOOLEAN DEFAULT FALSE,
+        selected_category TEXT,
+        comment_post_id INTEGER,
+        comment_idx INTEGER,
+        reply_idx INTEGER,
+        nested_idx INTEGER,
+        notifications_enabled BOOLEAN DEFAULT TRUE,
+        privacy_public BOOLEAN DEFAULT TRUE,
+        is_admin BOOLEAN DEFAULT FALSE,
+        waiting_for_private_message BOOLEAN DEFAULT FALSE,
+        private_message_target TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS followers (
+        follower_id TEXT,
+        followed_id TEXT,
+        PRIMARY KEY (follower_id, followed_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS posts (
+        post_id SERIAL PRIMARY KEY,
+        content TEXT,
+        author_id TEXT,
+        category TEXT,
+        channel_message_id BIGINT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        media_type TEXT DEFAULT 'text',
+        media_id TEXT,
+        comment_count INTEGER DEFAULT 0,
+        approved BOOLEAN DEFAULT FALSE,
+        admin_approved_by TEXT,
+        thread_from_post_id BIGINT DEFAULT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS comments (
+        comment_id SERIAL PRIMARY KEY,
+        post_id INTEGER REFERENCES posts(post_id),
+        parent_comment_id INTEGER DEFAULT 0,
+        author_id TEXT,
+        content TEXT,
+        type TEXT DEFAULT 'text',
+        file_id TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS reactions (
+        reaction_id SERIAL PRIMARY KEY,
+        comment_id INTEGER REFERENCES comments(comment_id),
+        user_id TEXT,
+        type TEXT,
+        UNIQUE(comment_id, user_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS private_messages (
+        message_id SERIAL PRIMARY KEY,
+        sender_id TEXT REFERENCES users(user_id),
+        receiver_id TEXT REFERENCES users(user_id),
+        content TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_read BOOLEAN DEFAULT FALSE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS blocks (
+        blocker_id TEXT REFERENCES users(user_id),
+        blocked_id TEXT REFERENCES users(user_id),
+        PRIMARY KEY (blocker_id, blocked_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS scheduled_broadcasts (
+        broadcast_id SERIAL PRIMARY KEY,
+        scheduled_by TEXT,
+        content TEXT,
+        media_type TEXT,
+        media_id TEXT,
+        scheduled_time TIMESTAMP,
+        status TEXT DEFAULT 'scheduled',
+        target_group TEXT DEFAULT 'all',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # ---------------- Database Schema Migration ----------------
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS thread_from_post_id BIGINT DEFAULT NULL",
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS vent_number INTEGER DEFAULT NULL",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS contribution_count INTEGER DEFAULT 0",
+    # ---------------- Indexes for the hot lookups ----------------
+    "CREATE INDEX IF NOT EXISTS idx_comments_post_parent_ts ON comments(post_id, parent_comment_id, timestamp DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_comments_parent ON comments(parent_comment_id)",
+    "CREATE INDEX IF NOT EXISTS idx_reactions_comment_type ON reactions(comment_id, type)",
+    # (author_id, timestamp) serves both the per-author counts and the My Posts pages
+    "DROP INDEX IF EXISTS idx_posts_author_approved",
+    "CREATE INDEX IF NOT EXISTS idx_posts_author_ts ON posts(author_id, timestamp DESC) WHERE approved",
+    "CREATE INDEX IF NOT EXISTS idx_posts_pending ON posts(timestamp) WHERE NOT approved",
+    "CREATE INDEX IF NOT EXISTS idx_followers_followed ON followers(followed_id)",
+    "CREATE INDEX IF NOT EXISTS idx_followers_follower ON followers(follower_id)",
+    # Per-author comment counts (profiles, contribution backfill)
+    "CREATE INDEX IF NOT EXISTS idx_comments_author ON comments(author_id)",
+    # ---------------- Leaderboard reads users.contribution_count (kept by the triggers below) ----------------
+    "DROP MATERIALIZED VIEW IF EXISTS leaderboard_top",
+    "CREATE INDEX IF NOT EXISTS idx_users_contribution ON users(contribution_count DESC)",
+    # ---------------- posts.comment_count maintained by trigger ----------------
+    '''
+    CREATE OR REPLACE FUNCTION bump_comment_count() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE posts SET comment_count = comment_count + 1 WHERE post_id = NEW.post_id;
+            RETURN NEW;
+        END IF;
+        UPDATE posts SET comment_count = GREATEST(comment_count - 1, 0) WHERE post_id = OLD.post_id;
+        RETURN OLD;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    "DROP TRIGGER IF EXISTS t_comments_count ON comments",
+    "CREATE TRIGGER t_comments_count AFTER INSERT OR DELETE ON comments FOR EACH ROW EXECUTE FUNCTION bump_comment_count()",
+    # Backfill counts that were never maintained before the trigger existed
+    "UPDATE posts SET comment_count = (SELECT COUNT(*) FROM comments WHERE comments.post_id = posts.post_id)",
+    # ---------------- users.contribution_count (approved posts + comments) maintained by triggers ----------------
+    '''
+    CREATE OR REPLACE FUNCTION bump_contribution_from_comment() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE users SET contribution_count = contribution_count + 1 WHERE user_id = NEW.author_id;
+            RETURN NEW;
+        END IF;
+        UPDATE users SET contribution_count = GREATEST(contribution_count - 1, 0) WHERE user_id = OLD.author_id;
+        RETURN OLD;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    "DROP TRIGGER IF EXISTS t_comments_contribution ON comments",
+    "CREATE TRIGGER t_comments_contribution AFTER INSERT OR DELETE ON comments FOR EACH ROW EXECUTE FUNCTION bump_contribution_from_comment()",
+    # Posts only count while approved: inserts/deletes of approved rows and approval flips
+    '''
+    CREATE OR REPLACE FUNCTION bump_contribution_from_post() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            IF OLD.approved THEN
+                UPDATE users SET contribution_count = GREATEST(contribution_count - 1, 0) WHERE user_id = OLD.author_id;
+            END IF;
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            IF NEW.approved THEN
+                UPDATE users SET contribution_count = contribution_count + 1 WHERE user_id = NEW.author_id;
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    "DROP TRIGGER IF EXISTS t_posts_contribution ON posts",
+    "CREATE TRIGGER t_posts_contribution AFTER INSERT OR DELETE ON posts FOR EACH ROW EXECUTE FUNCTION bump_contribution_from_post()",
+    "DROP TRIGGER IF EXISTS t_posts_contribution_approval ON posts",
+    '''
+    CREATE TRIGGER t_posts_contribution_approval AFTER UPDATE OF approved ON posts
+    FOR EACH ROW WHEN (OLD.approved IS DISTINCT FROM NEW.approved)
+    EXECUTE FUNCTION bump_contribution_from_post()
+    ''',
+    f"UPDATE users SET contribution_count = totals.total FROM ({USER_TOTALS_SQL}) totals WHERE totals.user_id = users.user_id",
+    # Fresh planner statistics so the new indexes are picked up straight away
+    "ANALYZE",
+]
+
 # Initialize database tables with schema migration
 def init_db():
     """Initialize database tables with schema migration"""
@@ -82,214 +297,85 @@ def init_db():
     try:
         with psycopg2.connect(DATABASE_URL) as conn:
             with conn.cursor() as c:
-                # ... rest of your existing init_db code ...
+                # Skip the DDL entirely when the database is already at this schema version
+                c.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+                c.execute("SELECT MAX(version) FROM schema_version")
+                current_version = c.fetchone()[0]
                 
-                # ---------------- Create Tables ----------------
-                c.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id TEXT PRIMARY KEY,
-                    anonymous_name TEXT,
-                    sex TEXT DEFAULT '👤',
-                    awaiting_name BOOLEAN DEFAULT FALSE,
-                    waiting_for_post BOOLEAN DEFAULT FALSE,
-                    waiting_for_comment BOOLEAN DEFAULT FALSE,
-                    selected_category TEXT,
-                    comment_post_id INTEGER,
-                    comment_idx INTEGER,
-                    reply_idx INTEGER,
-                    nested_idx INTEGER,
-                    notifications_enabled BOOLEAN DEFAULT TRUE,
-                    privacy_public BOOLEAN DEFAULT TRUE,
-                    is_admin BOOLEAN DEFAULT FALSE,
-                    waiting_for_private_message BOOLEAN DEFAULT FALSE,
-                    private_message_target TEXT
-                )
-                ''')
-
-                c.execute('''
-                CREATE TABLE IF NOT EXISTS followers (
-                    follower_id TEXT,
-                    followed_id TEXT,
-                    PRIMARY KEY (follower_id, followed_id)
-                )
-                ''')
-
-                c.execute('''
-                CREATE TABLE IF NOT EXISTS posts (
-                    post_id SERIAL PRIMARY KEY,
-                    content TEXT,
-                    author_id TEXT,
-                    category TEXT,
-                    channel_message_id BIGINT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    media_type TEXT DEFAULT 'text',
-                    media_id TEXT,
-                    comment_count INTEGER DEFAULT 0,
-                    approved BOOLEAN DEFAULT FALSE,
-                    admin_approved_by TEXT,
-                    thread_from_post_id BIGINT DEFAULT NULL
-                )
-                ''')
-
-                c.execute('''
-                CREATE TABLE IF NOT EXISTS comments (
-                    comment_id SERIAL PRIMARY KEY,
-                    post_id INTEGER REFERENCES posts(post_id),
-                    parent_comment_id INTEGER DEFAULT 0,
-                    author_id TEXT,
-                    content TEXT,
-                    type TEXT DEFAULT 'text',
-                    file_id TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                ''')
-
-                c.execute('''
-                CREATE TABLE IF NOT EXISTS reactions (
-                    reaction_id SERIAL PRIMARY KEY,
-                    comment_id INTEGER REFERENCES comments(comment_id),
-                    user_id TEXT,
-                    type TEXT,
-                    UNIQUE(comment_id, user_id)
-                )
-                ''')
-
-                c.execute('''
-                CREATE TABLE IF NOT EXISTS private_messages (
-                    message_id SERIAL PRIMARY KEY,
-                    sender_id TEXT REFERENCES users(user_id),
-                    receiver_id TEXT REFERENCES users(user_id),
-                    content TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_read BOOLEAN DEFAULT FALSE
-                )
-                ''')
-
-                c.execute('''
-                CREATE TABLE IF NOT EXISTS blocks (
-                    blocker_id TEXT REFERENCES users(user_id),
-                    blocked_id TEXT REFERENCES users(user_id),
-                    PRIMARY KEY (blocker_id, blocked_id)
-                )
-                ''')
-
-                c.execute('''
-                CREATE TABLE IF NOT EXISTS scheduled_broadcasts (
-                    broadcast_id SERIAL PRIMARY KEY,
-                    scheduled_by TEXT,
-                    content TEXT,
-                    media_type TEXT,
-                    media_id TEXT,
-                    scheduled_time TIMESTAMP,
-                    status TEXT DEFAULT 'scheduled',
-                    target_group TEXT DEFAULT 'all',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                ''')                  
-                async def schedule_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
-                    """Schedule a broadcast for later"""
-                    # Similar to execute_broadcast but stores in database
-                    pass
-                
-                async def check_scheduled_broadcasts(context: ContextTypes.DEFAULT_TYPE):
-                    """Check and send scheduled broadcasts"""
-                    scheduled = db_fetch_all('''
-                        SELECT * FROM scheduled_broadcasts 
-                        WHERE status = 'scheduled' 
-                        AND scheduled_time <= CURRENT_TIMESTAMP
-                    ''')
-                    
-                    for broadcast in scheduled:
-                        # Send the broadcast
-                        # Update status to 'sent'
-                        pass
-                
-                # Schedule this to run every minute in main():
-                job_queue.run_repeating(check_scheduled_broadcasts, interval=60, first=10)
-
-                # ---------------- Database Schema Migration ----------------
-                # Check if thread_from_post_id column exists, if not add it
-                c.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='posts' AND column_name='thread_from_post_id'
-                """)
-                if not c.fetchone():
-                    logger.info("Adding missing column: thread_from_post_id to posts table")
-                    c.execute("ALTER TABLE posts ADD COLUMN thread_from_post_id BIGINT DEFAULT NULL")
-
-                # Check if vent_number column exists, if not add it
-                c.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='posts' AND column_name='vent_number'
-                """)
-                if not c.fetchone():
-                    logger.info("Adding missing column: vent_number to posts table")
-                    c.execute("ALTER TABLE posts ADD COLUMN vent_number INTEGER DEFAULT NULL")
-                
-                # Add other missing columns if needed in the future
-                # Example for future migrations:
-                # c.execute("""
-                #     SELECT column_name 
-                #     FROM information_schema.columns 
-                #     WHERE table_name='users' AND column_name='new_column'
-                # """)
-                # if not c.fetchone():
-                #     c.execute("ALTER TABLE users ADD COLUMN new_column TEXT DEFAULT NULL")
-
-                # ---------------- Create admin user if specified ----------------
-                if ADMIN_ID:
+                if current_version == SCHEMA_VERSION:
+                    logging.info("Database schema is up to date (version %s)", SCHEMA_VERSION)
+                else:
+                    # ---------------- Create Tables / Migrate ----------------
+                    logging.info("Migrating database schema from version %s to %s", current_version, SCHEMA_VERSION)
+                    c.execute(";\n".join(SCHEMA_DDL))
+                    c.execute("DELETE FROM schema_version")
+                    c.execute("INSERT INTO schema_version (version) VALUES (%s)", (SCHEMA_VERSION,))
+
+                # ---------------- Create admin users if specified ----------------
+                for admin_id in ADMIN_IDS:
                     c.execute('''
                         INSERT INTO users (user_id, anonymous_name, is_admin)
                         VALUES (%s, %s, TRUE)
                         ON CONFLICT (user_id) DO UPDATE SET is_admin = TRUE
-                    ''', (ADMIN_ID, "Admin"))
-
-        pass
+                    ''', (str(admin_id), "Admin"))
                 
         logging.info("PostgreSQL database initialized successfully")
     except Exception as e:
-        logging.error(f"Database initialization failed: {e}")
+        logging.error("Database initialization failed: %s", e)
         raise
 # ==================== LOADING ANIMATIONS ====================
+# Reactions -> comments -> post, sent as one multi-statement round-trip in one transaction
+DELETE_POST_CASCADE_SQL = """
+    DELETE FROM reactions WHERE comment_id IN (SELECT comment_id FROM comments WHERE post_id = %(post_id)s);
+    DELETE FROM comments WHERE post_id = %(post_id)s;
+    DELETE FROM posts WHERE post_id = %(post_id)s
+"""
+
+async def delete_post_cascade(post_id):
+    """Delete a post together with its comments and their reactions"""
+    result = await db_execute(DELETE_POST_CASCADE_SQL, {'post_id': post_id})
+    cache_invalidate(POST_CACHE, post_id)
+    return result
+
+# Bulk vent renumbering: every (vent_number, post_id) pair goes in as one VALUES list
+VENT_NUMBER_UPDATE_SQL = (
+    "UPDATE posts SET vent_number = v.vent_number "
+    "FROM (VALUES %s) AS v (vent_number, post_id) WHERE posts.post_id = v.post_id"
+)
+
 def assign_vent_numbers_to_existing_posts():
     """Assign vent numbers to existing approved posts"""
     try:
         # Get all approved posts without vent numbers
-        posts = db_fetch_all(
-            "SELECT post_id FROM posts WHERE approved = TRUE AND vent_number IS NULL ORDER BY timestamp ASC"
+        posts = db_fetch_all_sync(
+            "SELECT post_id, content, category, channel_message_id FROM posts WHERE approved = TRUE AND vent_number IS NULL ORDER BY timestamp ASC"
         )
         
         if not posts:
             return
         
         # Get current max vent number
-        max_vent = db_fetch_one("SELECT MAX(vent_number) as max_num FROM posts WHERE approved = TRUE")
+        max_vent = db_fetch_one_sync("SELECT MAX(vent_number) as max_num FROM posts WHERE approved = TRUE")
         next_vent_number = (max_vent['max_num'] or 0) + 1
         
-        # Assign numbers sequentially
+        # Assign numbers sequentially in one UPDATE ... FROM (VALUES ...)
+        db_execute_values_sync(
+            VENT_NUMBER_UPDATE_SQL,
+            [(next_vent_number + i, post['post_id']) for i, post in enumerate(posts)],
+            fetch=False
+        )
+        
         for post in posts:
-            db_execute(
-                "UPDATE posts SET vent_number = %s WHERE post_id = %s",
-                (next_vent_number, post['post_id'])
-            )
-            
             # Try to update the channel post if it exists
-            post_data = db_fetch_one(
-                "SELECT content, category, channel_message_id FROM posts WHERE post_id = %s",
-                (post['post_id'],)
-            )
-            
-            if post_data and post_data['channel_message_id']:
+            if post['channel_message_id']:
                 try:
                     # Update the channel post
                     vent_number_str = f"Vent - {next_vent_number:03d}"
-                    hashtag = f"#{post_data['category']}"
+                    hashtag = f"#{post['category']}"
                     
                     new_caption = (
                         f"`{vent_number_str}`\n\n"
-                        f"{post_data['content']}\n\n"
+                        f"{post['content']}\n\n"
                         f"━━━━━━━━━━━━━━━\n"
                         f"{hashtag}\n"
                         f"[Telegram](https://t.me/christianvent)| [Bot](https://t.me/{BOT_USERNAME})"
@@ -297,24 +383,22 @@ def assign_vent_numbers_to_existing_posts():
                     
                     # We can't edit the message here without the bot instance
                     # This would need to be run in a context where we have access to the bot
-                    logger.info(f"Post {post['post_id']} should be updated to Vent - {next_vent_number:03d}")
+                    logger.debug("Post %s should be updated to Vent - %03d", post['post_id'], next_vent_number)
                     
                 except Exception as e:
-                    logger.error(f"Error updating post {post['post_id']}: {e}")
+                    logger.error("Error updating post %s: %s", post['post_id'], e)
             
             next_vent_number += 1
         
-        logger.info(f"Assigned vent numbers to {len(posts)} existing posts")
+        logger.info("Assigned vent numbers to %s existing posts", len(posts))
         
     except Exception as e:
-        logger.error(f"Error assigning vent numbers: {e}")
+        logger.error("Error assigning vent numbers: %s", e)
 
 async def fix_vent_numbers(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     """Admin command to fix vent numbers"""
                     user_id = str(update.effective_user.id)
-                    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-                    
-                    if not user or not user['is_admin']:
+                    if not await is_admin_user(user_id):
                         await update.message.reply_text("❌ You don't have permission to use this command.")
                         return
                     
@@ -322,25 +406,25 @@ async def fix_vent_numbers(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     
                     try:
                         # Reset all vent numbers first
-                        db_execute("UPDATE posts SET vent_number = NULL WHERE approved = TRUE")
+                        await db_execute("UPDATE posts SET vent_number = NULL WHERE approved = TRUE")
                         
                         # Get all approved posts in chronological order
-                        posts = db_fetch_all(
+                        posts = await db_fetch_all(
                             "SELECT post_id FROM posts WHERE approved = TRUE ORDER BY timestamp ASC"
                         )
                         
-                        count = 0
-                        for idx, post in enumerate(posts, start=1):
-                            db_execute(
-                                "UPDATE posts SET vent_number = %s WHERE post_id = %s",
-                                (idx, post['post_id'])
-                            )
-                            count += 1
+                        await db_execute_values(
+                            VENT_NUMBER_UPDATE_SQL,
+                            [(idx, post['post_id']) for idx, post in enumerate(posts, start=1)],
+                            fetch=False
+                        )
+                        count = len(posts)
+                        cache_clear(POST_CACHE)
                         
                         await update.message.reply_text(f"✅ Successfully assigned vent numbers to {count} posts.")
                         
                     except Exception as e:
-                        logger.error(f"Error in fix_vent_numbers: {e}")
+                        logger.error("Error in fix_vent_numbers: %s", e)
                         await update.message.reply_text(f"❌ Error: {str(e)}")
 def is_media_message(message):
     """Check if a message contains media"""
@@ -368,7 +452,7 @@ async def show_loading(update_or_message, loading_text="⏳ Processing...", edit
             loading_msg = await update_or_message.message.reply_text(loading_text)
             return loading_msg
     except Exception as e:
-        logger.error(f"Error showing loading: {e}")
+        logger.error("Error showing loading: %s", e)
         return None
 
 async def typing_animation(context, chat_id, duration=1):
@@ -410,17 +494,83 @@ async def replace_with_error(loading_msg, error_text):
 # -------------------- PostgreSQL Connection Pool --------------------
 from psycopg2 import pool
 
-# Create a global connection pool (reuses DB connections instead of reconnecting every time)
-try:
-    db_pool = pool.SimpleConnectionPool(
-        1, 10,  # min 1, max 10 connections
-        dsn=DATABASE_URL,
-        cursor_factory=RealDictCursor
-    )
-    logging.info("✅ Database connection pool created successfully")
-except Exception as e:
-    logging.error(f"❌ Failed to create database pool: {e}")
-    db_pool = None
+# Pool bounds - handlers run concurrently, so the pool must be thread-safe and roomy
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 4))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 25))
+# How many updates PTB processes at once; capped at DB_POOL_MAX since a handler may hold a
+# db_session() connection on top of the DB_EXECUTOR workers' checkouts
+CONCURRENT_UPDATES = min(int(os.getenv('CONCURRENT_UPDATES', 32)), DB_POOL_MAX)
+# Seconds an idle connection beyond DB_POOL_MIN stays open before it is closed
+DB_POOL_MAX_IDLE = int(os.getenv('DB_POOL_MAX_IDLE', 300))
+
+# Global connection pool (reuses DB connections instead of reconnecting every time).
+# Created by init_database_pool() at startup, not at import, and closed on shutdown.
+db_pool = None
+
+class WarmConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that keeps returned connections (up to maxconn) instead of
+    closing every one beyond minconn, so bursts reuse warm connections and their prepared
+    statements; trim_idle() closes the extras once they sit unused for max_idle seconds."""
+
+    def __init__(self, minconn, maxconn, *args, max_idle=300, **kwargs):
+        self.max_idle = max_idle
+        self._returned_at = weakref.WeakKeyDictionary()
+        self._checked_out = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        conn = super().getconn(key)
+        with self._lock:
+            self._checked_out += 1
+        return conn
+
+    def putconn(self, conn=None, key=None, close=False):
+        super().putconn(conn, key, close)
+        with self._lock:
+            self._checked_out -= 1
+
+    def stats(self):
+        """Connections checked out and sitting idle, from this pool's own bookkeeping"""
+        with self._lock:
+            return {'used': self._checked_out, 'idle': len(self._pool)}
+
+    def _putconn(self, conn, key=None, close=False):
+        """Put a connection back on the idle list (LIFO) unless it is closed, broken or close=True.
+        Replaces the base rule that closes every connection returned once minconn are idle."""
+        if self.closed:
+            raise pool.PoolError("connection pool is closed")
+        if key is None:
+            key = self._rused.get(id(conn))
+            if key is None:
+                raise pool.PoolError("trying to put unkeyed connection")
+
+        if close or conn.closed:
+            conn.close()
+        elif conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            # Server connection lost
+            conn.close()
+        else:
+            if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            self._pool.append(conn)
+            self._returned_at[conn] = time.monotonic()
+
+        del self._used[key]
+        del self._rused[id(conn)]
+
+    def trim_idle(self):
+        """Close idle connections beyond minconn unused for max_idle seconds; returns how many"""
+        cutoff = time.monotonic() - self.max_idle
+        with self._lock:
+            if self.closed:
+                return 0
+            # getconn pops from the end, so the coldest connections sit at the front
+            spare = self._pool[:max(0, len(self._pool) - self.minconn)]
+            stale = [conn for conn in spare if self._returned_at.get(conn, 0) < cutoff]
+            for conn in stale:
+                self._pool.remove(conn)
+                conn.close()
+        return len(stale)
 
 # Database helper functions - FIXED VERSION
 # -------------------- PostgreSQL Connection Pool --------------------
@@ -438,23 +588,92 @@ def init_database_pool():
         
         # Parse the database URL for logging (remove password)
         safe_url = database_url.split('@')[-1] if '@' in database_url else database_url
-        logger.info(f"🔗 Connecting to database: {safe_url}")
+        logger.info("🔗 Connecting to database: %s", safe_url)
+        
+        # Reuse an existing pool instead of leaking a second one
+        if db_pool and not db_pool.closed:
+            return True
         
-        db_pool = pool.SimpleConnectionPool(
-            1, 10,  # min 1, max 10 connections
+        db_pool = WarmConnectionPool(
+            DB_POOL_MIN, DB_POOL_MAX,
             dsn=database_url,
-            cursor_factory=RealDictCursor
+            cursor_factory=RealDictCursor,
+            max_idle=DB_POOL_MAX_IDLE
         )
-        logging.info("✅ Database connection pool created successfully")
+        logging.info("✅ Database connection pool created successfully (min=%s, max=%s)", DB_POOL_MIN, DB_POOL_MAX)
         return True
     except Exception as e:
-        logging.error(f"❌ Failed to create database pool: {e}")
+        logging.error("❌ Failed to create database pool: %s", e)
         return False
-def db_execute(query, params=(), fetch=False, fetchone=False):
-    """Execute a SQL query using the global connection pool."""
+# Connection held by an enclosing db_session(); queries reuse it instead of get/put per call
+_session_conn = contextvars.ContextVar('db_session_conn', default=None)
+
+# What the message handlers read off the user row: identity plus the pending-input state
+USER_STATE_COLUMNS = (
+    "user_id, anonymous_name, sex, is_admin, awaiting_name, "
+    "waiting_for_post, selected_category, "
+    "waiting_for_comment, comment_post_id, comment_idx, "
+    "waiting_for_private_message, private_message_target"
+)
+
+# Hot single-row statements, parsed and planned once per pooled connection and then run via EXECUTE
+PREPARED_STATEMENTS = {
+    # Runs on every incoming message (get_or_create_user)
+    'upsert_user_state': (
+        "INSERT INTO users (user_id, anonymous_name, sex, is_admin) VALUES ($1, $2, $3, $4) "
+        "ON CONFLICT (user_id) DO UPDATE SET anonymous_name = users.anonymous_name "
+        f"RETURNING {USER_STATE_COLUMNS}"
+    ),
+    'user_settings': "SELECT notifications_enabled, privacy_public, is_admin FROM users WHERE user_id = $1",
+    'admin_flag': "SELECT is_admin FROM users WHERE user_id = $1",
+    'post_by_id': "SELECT * FROM posts WHERE post_id = $1",
+    'user_profile': "SELECT user_id, anonymous_name, sex, notifications_enabled FROM users WHERE user_id = $1",
+    'user_rating': "SELECT contribution_count AS rating FROM users WHERE user_id = $1",
+    # Users strictly ahead of this one, counted on idx_users_contribution
+    'user_rank': (
+        "SELECT (SELECT COUNT(*) FROM users o WHERE o.contribution_count > u.contribution_count) + 1 AS rank "
+        "FROM users u WHERE u.user_id = $1"
+    ),
+}
+# Statement names already prepared on each connection (entries vanish with the connection)
+_prepared_on = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+def _ensure_prepared(conn, name):
+    """PREPARE a PREPARED_STATEMENTS entry on this connection the first time it is used there"""
+    with _prepared_lock:
+        if name in _prepared_on.get(conn, ()):
+            return
+    with conn.cursor() as cur:
+        try:
+            cur.execute(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}")
+            conn.commit()
+        except psycopg2.errors.DuplicatePreparedStatement:
+            conn.rollback()
+    with _prepared_lock:
+        _prepared_on.setdefault(conn, set()).add(name)
+
+# Conflicts the server rolled back on its own - the statement is safe to run again once
+RETRYABLE_DB_ERRORS = (psycopg2.errors.SerializationFailure, psycopg2.errors.DeadlockDetected)
+
+def _release_conn(conn, session_conn):
+    """Undo a failed transaction and hand the connection back (a dead one is dropped from the pool)"""
+    if not conn.closed:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            pass
+    if conn is not session_conn:
+        db_pool.putconn(conn, close=bool(conn.closed))
+
+def db_execute_sync(query, params=(), fetch=False, fetchone=False, prepared=None, _retry=True):
+    """Execute a SQL query using the global connection pool (prepared names a PREPARED_STATEMENTS entry)."""
     conn = None
+    session_conn = _session_conn.get()
     try:
-        conn = db_pool.getconn()
+        conn = session_conn or db_pool.getconn()
+        if prepared:
+            _ensure_prepared(conn, prepared)
         with conn.cursor() as cur:
             cur.execute(query, params)
             if fetch:
@@ -464,26 +683,148 @@ def db_execute(query, params=(), fetch=False, fetchone=False):
             else:
                 result = True
             conn.commit()
-            return result
+    except RETRYABLE_DB_ERRORS as e:
+        _release_conn(conn, session_conn)
+        if _retry:
+            return db_execute_sync(query, params, fetch, fetchone, prepared, _retry=False)
+        logger.error("Database error: %s", e)
+        return None
     except Exception as e:
-        logging.error(f"Database error: {e}")
+        logger.error("Database error: %s", e)
         if conn:
-            conn.rollback()
+            _release_conn(conn, session_conn)
         return None
-    finally:
+    if conn is not session_conn:
+        db_pool.putconn(conn)
+    return result
+
+
+def db_execute_values_sync(query, rows, template=None, fetch=True):
+    """Expand rows into the query's single VALUES %s, 500 rows per statement, in one transaction.
+    Returns the RETURNING rows (or True when fetch=False), None on error."""
+    if not rows:
+        return [] if fetch else True
+    conn = None
+    session_conn = _session_conn.get()
+    try:
+        conn = session_conn or db_pool.getconn()
+        with conn.cursor() as cur:
+            result = execute_values(cur, query, rows, template=template, page_size=500, fetch=fetch)
+            conn.commit()
+    except Exception as e:
+        logger.error("Database error: %s", e)
         if conn:
-            db_pool.putconn(conn)
+            _release_conn(conn, session_conn)
+        return None
+    if conn is not session_conn:
+        db_pool.putconn(conn)
+    return result if fetch else True
+
+def db_fetch_one_sync(query, params=()):
+    return db_execute_sync(query, params, fetchone=True)
+
+def db_fetch_one_prepared_sync(name, params):
+    """Fetch one row through the named prepared statement"""
+    placeholders = ', '.join(['%s'] * len(params))
+    return db_execute_sync(f"EXECUTE {name}({placeholders})", params, fetchone=True, prepared=name)
+
+def db_fetch_all_sync(query, params=()):
+    return db_execute_sync(query, params, fetch=True)
+
+# psycopg2 blocks, so bot handlers run queries on a dedicated thread pool (one worker per
+# pooled connection) and await the result instead of freezing the event loop.
+# The *_sync helpers above stay for the Flask routes and startup code.
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_POOL_MAX, thread_name_prefix='db')
+
+# run_db calls submitted and not yet finished (only touched on the event loop thread)
+_db_calls_in_flight = 0
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database helper on the DB executor and await its result"""
+    global _db_calls_in_flight
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    _db_calls_in_flight += 1
+    try:
+        return await loop.run_in_executor(DB_EXECUTOR, call)
+    finally:
+        _db_calls_in_flight -= 1
+
+async def db_execute(query, params=(), fetch=False, fetchone=False):
+    return await run_db(db_execute_sync, query, params, fetch, fetchone)
+
+async def db_execute_values(query, rows, template=None, fetch=True):
+    return await run_db(db_execute_values_sync, query, rows, template, fetch)
+
+async def db_fetch_one(query, params=()):
+    return await run_db(db_execute_sync, query, params, fetchone=True)
+
+async def db_fetch_all(query, params=()):
+    return await run_db(db_execute_sync, query, params, fetch=True)
+
+async def db_fetch_one_prepared(name, params):
+    return await run_db(db_fetch_one_prepared_sync, name, params)
+
+@asynccontextmanager
+async def db_session():
+    """Hold one pooled connection for every query awaited inside the block (nesting reuses it)"""
+    if _session_conn.get() is not None:
+        yield _session_conn.get()
+        return
+    try:
+        conn = await run_db(db_pool.getconn)
+    except pool.PoolError as e:
+        # Pool exhausted: let the queries inside check out connections one call at a time
+        log_exception_throttled("db_session without a dedicated connection: %s", e)
+        yield None
+        return
+    token = _session_conn.set(conn)
+    try:
+        yield conn
+    finally:
+        _session_conn.reset(token)
+        db_pool.putconn(conn, close=bool(conn.closed))
 
+# 📊 Pool pressure sampling - the pool itself never queues, so "waiting" is DB work queued on DB_EXECUTOR
+POOL_STATS_INTERVAL_SECONDS = 30
+POOL_SATURATION_RATIO = 0.8
+POOL_SATURATION_SAMPLES = 3
 
-def db_fetch_one(query, params=()):
-    return db_execute(query, params, fetchone=True)
+def db_pool_stats():
+    """Connections in use/idle and queued DB calls, or None before the pool exists"""
+    if db_pool is None or db_pool.closed:
+        return None
+    stats = db_pool.stats()
+    return {
+        'total': stats['used'] + stats['idle'],
+        'idle': stats['idle'],
+        'used': stats['used'],
+        'max': DB_POOL_MAX,
+        # Calls beyond one per executor worker are queued behind the busy ones
+        'waiting': max(0, _db_calls_in_flight - DB_POOL_MAX),
+    }
 
-def db_fetch_all(query, params=()):
-    return db_execute(query, params, fetch=True)
+async def sample_pool_stats(context: ContextTypes.DEFAULT_TYPE):
+    """Job: trim cold idle connections, log pool usage and warn once it has stayed saturated"""
+    stats = db_pool_stats()
+    if not stats:
+        return
+    trimmed = await run_db(db_pool.trim_idle)
+    if trimmed:
+        logger.info("DB pool: closed %s idle connections", trimmed)
+    logger.info("DB pool: %(used)s/%(max)s used, %(idle)s idle, %(waiting)s waiting", stats)
+    saturated = stats['waiting'] > 0 or stats['used'] >= POOL_SATURATION_RATIO * stats['max']
+    streak = context.bot_data.get('pool_saturated_samples', 0) + 1 if saturated else 0
+    context.bot_data['pool_saturated_samples'] = streak
+    if streak >= POOL_SATURATION_SAMPLES:
+        logger.warning(
+            "⚠️ DB pool saturated for %s samples: %s/%s used, %s waiting",
+            streak, stats['used'], stats['max'], stats['waiting']
+        )
 async def reset_user_waiting_states(user_id: str, chat_id: int = None, context: ContextTypes.DEFAULT_TYPE = None):
     """Reset all waiting states for a user and optionally restore main menu"""
     # Reset database states
-    db_execute('''
+    await db_execute('''
         UPDATE users 
         SET waiting_for_post = FALSE, 
             waiting_for_comment = FALSE, 
@@ -505,7 +846,7 @@ async def reset_user_waiting_states(user_id: str, chat_id: int = None, context:
                 reply_markup=main_menu
             )
         except Exception as e:
-            logger.error(f"Error restoring main menu: {e}")
+            logger.error("Error restoring main menu: %s", e)
 # Categories
 CATEGORIES = [
     ("🙏 Pray For Me", "PrayForMe"),
@@ -520,6 +861,9 @@ CATEGORIES = [
     ("🔖 Other", "Other"),
 ] 
 
+# O(1) code -> display name lookup for category callbacks
+CATEGORIES_BY_CODE = {code: name for name, code in CATEGORIES}
+
 def build_category_buttons():
     buttons = []
     for i in range(0, len(CATEGORIES), 2):
@@ -531,6 +875,9 @@ def build_category_buttons():
         buttons.append(row)
     return InlineKeyboardMarkup(buttons) 
 
+# The category picker never changes, so build it once
+CATEGORY_MARKUP = build_category_buttons()
+
 
 # Initialize Flask app for Render health checks
 flask_app = Flask(__name__, static_folder='static')
@@ -559,7 +906,7 @@ def main_page():
                 # Token is valid, show mini app with user info
                 return mini_app_page()
     except Exception as e:
-        logger.error(f"Error verifying token: {e}")
+        logger.error("Error verifying token: %s", e)
     
     # Invalid token or error - redirect to login
     return redirect('/login')
@@ -732,7 +1079,7 @@ def generate_token(user_id):
             'token': token
         })
     except Exception as e:
-        logger.error(f"Error generating token: {e}")
+        logger.error("Error generating token: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # Verify token
@@ -748,7 +1095,7 @@ def verify_token(token):
             return jsonify({'success': False, 'error': 'Invalid token format'}), 401
         
         # Check if user exists
-        user = db_fetch_one("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
+        user = db_fetch_one_sync("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
         if not user:
             return jsonify({'success': False, 'error': 'User not found'}), 401
         
@@ -762,7 +1109,7 @@ def verify_token(token):
     except jwt.InvalidTokenError:
         return jsonify({'success': False, 'error': 'Invalid token'}), 401
     except Exception as e:
-        logger.error(f"Error verifying token: {e}")
+        logger.error("Error verifying token: %s", e)
         return jsonify({'success': False, 'error': 'Token verification failed'}), 500
 @flask_app.route('/test-api')
 def test_api():
@@ -783,7 +1130,7 @@ def health_check():
     """Enhanced health check for Railway"""
     try:
         # Test database connection
-        test_db = db_fetch_one("SELECT 1 as test")
+        test_db = db_fetch_one_sync("SELECT 1 as test")
         if test_db and test_db['test'] == 1:
             return jsonify({
                 "status": "healthy",
@@ -827,6 +1174,16 @@ def readiness_probe():
     """Readiness probe for Railway"""
     return jsonify(status="ready"), 200
 
+@flask_app.route('/pool-stats')
+def pool_stats():
+    """DB pool usage for operators (requires the X-Admin-Secret header)"""
+    if not ADMIN_SECRET or not hmac.compare_digest(request.headers.get('X-Admin-Secret', ''), ADMIN_SECRET):
+        return jsonify(error="Forbidden"), 403
+    stats = db_pool_stats()
+    if stats is None:
+        return jsonify(error="Database pool not initialized"), 503
+    return jsonify(stats)
+
 # Create main menu keyboard with improved buttons
 main_menu = ReplyKeyboardMarkup(
     keyboard=[
@@ -847,30 +1204,134 @@ cancel_menu = ReplyKeyboardMarkup(
     one_time_keyboard=False
 )
 
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+# Inline main menu shared by /start, /menu and the 'menu' callback - built once at import
+MAIN_MENU_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🌟 Share My Thoughts", callback_data='ask'),
+        InlineKeyboardButton("👤 View Profile", callback_data='profile')
+    ],
+    [
+        InlineKeyboardButton("📚 My Content", callback_data='my_content_menu'),
+        InlineKeyboardButton("🏆 Leaderboard", callback_data='leaderboard')
+    ],
+    [
+        InlineKeyboardButton("⚙️ Settings", callback_data='settings'),
+        InlineKeyboardButton("❓ Help", callback_data='help')
+    ]
+])
+
+# Single "back to menu" button used under help/about/confirmation messages
+MAIN_MENU_ROW = (InlineKeyboardButton("📱 Main Menu", callback_data='menu'),)
+BACK_TO_MENU_MARKUP = InlineKeyboardMarkup([MAIN_MENU_ROW])
+
+# Other static keyboards shown on every post submission / profile edit / content visit
+POST_CONFIRM_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("✏️ Edit", callback_data='edit_post'),
+        InlineKeyboardButton("❌ Cancel", callback_data='cancel_post')
+    ],
+    [
+        InlineKeyboardButton("✅ Submit", callback_data='confirm_post')
+    ]
+])
+
+SEX_PICKER_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("👨 Male", callback_data='sex_male')],
+    [InlineKeyboardButton("👩 Female", callback_data='sex_female')]
+])
+
+MY_CONTENT_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📝 My Posts", callback_data='my_posts_1')],
+    [InlineKeyboardButton("💬 My Comments", callback_data='my_comments_1')],
+    MAIN_MENU_ROW
+])
+
+LEADERBOARD_NAV_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📱 Menu", callback_data='menu')],
+    [InlineKeyboardButton("👤 My Profile", callback_data='profile')]
+])
+
+PROFILE_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✏️ Set My Name", callback_data='edit_name')],
+    [InlineKeyboardButton("⚧️ Set My Sex", callback_data='edit_sex')],
+    [InlineKeyboardButton("📚 My Content", callback_data='my_content_menu')],
+    [InlineKeyboardButton("📭 Inbox", callback_data='inbox')],
+    [InlineKeyboardButton("⚙️ Settings", callback_data='settings')],
+    MAIN_MENU_ROW
+])
+
+# Empty states and the broadcast report
+NO_POSTS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🌟 Share My Thoughts", callback_data='ask')],
+    [InlineKeyboardButton("📚 Back to My Content", callback_data='my_content_menu')],
+    MAIN_MENU_ROW
+])
+
+NO_COMMENTS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📚 Back to My Content", callback_data='my_content_menu')],
+    MAIN_MENU_ROW
+])
+
+EMPTY_INBOX_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔍 View Leaderboard", callback_data='leaderboard')],
+    MAIN_MENU_ROW
+])
+
+BROADCAST_DONE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📊 Send Another", callback_data='admin_broadcast')],
+    [InlineKeyboardButton("🛠️ Admin Panel", callback_data='admin_panel')],
+    MAIN_MENU_ROW
+])
+
+# Bottom row of the my-posts list and single-post views
+CONTENT_NAV_ROW = (
+    InlineKeyboardButton("📚 Back to My Content", callback_data='my_content_menu'),
+    InlineKeyboardButton("📱 Main Menu", callback_data='menu')
 )
-logger = logging.getLogger(__name__) 
+
+def build_settings_markup(notifications_enabled, privacy_public, is_admin):
+    notifications_status = "✅ ON" if notifications_enabled else "❌ OFF"
+    privacy_status = "🌍 Public" if privacy_public else "🔒 Private"
+    keyboard = [
+        [InlineKeyboardButton(f"🔔 Notifications: {notifications_status}", callback_data='toggle_notifications')],
+        [InlineKeyboardButton(f"👁‍🗨 Privacy: {privacy_status}", callback_data='toggle_privacy')],
+        [
+            InlineKeyboardButton("📱 Main Menu", callback_data='menu'),
+            InlineKeyboardButton("👤 Profile", callback_data='profile')
+        ]
+    ]
+    if is_admin:
+        keyboard.insert(0, [InlineKeyboardButton("🛠 Admin Panel", callback_data='admin_panel')])
+    return InlineKeyboardMarkup(keyboard)
+
+# Settings menu for every (notifications, privacy, admin) combination - there are only eight
+SETTINGS_MARKUPS = {
+    (notifications, privacy, admin): build_settings_markup(notifications, privacy, admin)
+    for notifications in (False, True)
+    for privacy in (False, True)
+    for admin in (False, True)
+}
+
 
 def create_anonymous_name(user_id):
     # Simply return "Anonymous" without numbers for all new users
     return "Anonymous"
 
-def calculate_user_rating(user_id):
-    post_row = db_fetch_one(
-        "SELECT COUNT(*) as count FROM posts WHERE author_id = %s AND approved = TRUE",
-        (user_id,)
+async def get_or_create_user(user_id):
+    """Return the user's state row, creating it on first contact - a single upsert round trip"""
+    return await db_fetch_one_prepared(
+        'upsert_user_state',
+        (user_id, create_anonymous_name(user_id), '👤', int(user_id) in ADMIN_IDS)
     )
-    post_count = post_row['count'] if post_row else 0
-    
-    comment_row = db_fetch_one(
-        "SELECT COUNT(*) as count FROM comments WHERE author_id = %s",
-        (user_id,)
-    )
-    comment_count = comment_row['count'] if comment_row else 0
-    
-    return post_count + comment_count
+
+def calculate_user_rating(user_id):
+    """Approved posts + comments for a user, memoized for a minute"""
+    return cache_get_or_set(RATING_CACHE, user_id, lambda: _calculate_user_rating(user_id))
+
+def _calculate_user_rating(user_id):
+    # Approved posts + comments, kept on the user row by triggers
+    row = db_fetch_one_prepared_sync('user_rating', (user_id,))
+    return (row['rating'] or 0) if row else 0
 
 def format_aura(rating):
     """Create aura based on contribution points."""
@@ -885,34 +1346,90 @@ def format_aura(rating):
     else:
         return "⚪️"  # White aura for new users (0-9 points)
 
-def count_all_comments(post_id):
-    def count_replies(parent_id=None):
-        if parent_id is None:
-            comments = db_fetch_all(
-                "SELECT comment_id FROM comments WHERE post_id = %s AND parent_comment_id = 0",
-                (post_id,)
-            )
-        else:
-            comments = db_fetch_all(
-                "SELECT comment_id FROM comments WHERE parent_comment_id = %s",
-                (parent_id,)
-            )
-        
-        total = len(comments)
-        for comment in comments:
-            total += count_replies(comment['comment_id'])
-        return total
-    
-    return count_replies()
-def get_cancel_reply_keyboard():
-    """Create cancel button for reply keyboard (text) - ONLY for input states"""
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton("❌ Cancel")]
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True,  # Set to True so it disappears after use
+# 🧮 Short-lived in-process caches for hot read paths
+LEADERBOARD_CACHE = TTLCache(maxsize=1, ttl=60)
+# Each viewer's own leaderboard position (a full aggregate over users/posts/comments to compute)
+USER_RANK_CACHE = TTLCache(maxsize=10_000, ttl=60)
+RATING_CACHE = TTLCache(maxsize=50_000, ttl=60)
+# Rendered author line (name, link, aura) per comment id - lets page revisits skip author/rating lookups.
+# Cleared on any rename/sex change (entries aren't indexed by author); points may lag by the TTL
+COMMENT_RENDER_CACHE = TTLCache(maxsize=50_000, ttl=120)
+# Post rows - admins approve in bursts and comment pages reopen the same post
+POST_CACHE = TTLCache(maxsize=1024, ttl=30)
+# Display fields of user rows (name, sex, notification opt-in) for notifications and comment rendering
+USER_PROFILE_CACHE = TTLCache(maxsize=10_000, ttl=60)
+# users.is_admin per user id - checked on every admin screen and button press
+ADMIN_FLAG_CACHE = TTLCache(maxsize=256, ttl=300)
+# (message, exception type) pairs logged in the last second - a failing dependency shouldn't flood the log
+LOG_THROTTLE_CACHE = TTLCache(maxsize=256, ttl=1)
+_cache_lock = threading.Lock()
+
+def cache_get_or_set(cache, key, compute):
+    """Return cache[key], computing and storing it on a miss (None results are not cached)"""
+    with _cache_lock:
+        if key in cache:
+            return cache[key]
+    value = compute()
+    if value is not None:
+        with _cache_lock:
+            cache[key] = value
+    return value
+
+def cache_get(cache, key):
+    with _cache_lock:
+        return cache.get(key)
+
+def cache_set(cache, key, value):
+    with _cache_lock:
+        cache[key] = value
+
+def cache_invalidate(cache, key):
+    with _cache_lock:
+        cache.pop(key, None)
+
+def cache_clear(cache):
+    with _cache_lock:
+        cache.clear()
+
+def log_exception_throttled(message, *args):
+    """logger.exception for the active exception, at most once per second per call site and exception type"""
+    key = (message, sys.exc_info()[0])
+    with _cache_lock:
+        if key in LOG_THROTTLE_CACHE:
+            return
+        LOG_THROTTLE_CACHE[key] = True
+    logger.exception(message, *args)
+
+def get_post_sync(post_id):
+    """Post row by id, served from POST_CACHE when fresh"""
+    return cache_get_or_set(
+        POST_CACHE, post_id,
+        lambda: db_fetch_one_prepared_sync('post_by_id', (post_id,))
     )
+
+async def get_post(post_id):
+    return await run_db(get_post_sync, post_id)
+
+def get_user_profile_sync(user_id):
+    """anonymous_name / sex / notifications_enabled for a user, served from USER_PROFILE_CACHE when fresh"""
+    user_id = str(user_id)
+    return cache_get_or_set(
+        USER_PROFILE_CACHE, user_id,
+        lambda: db_fetch_one_prepared_sync('user_profile', (user_id,))
+    )
+
+async def get_user_profile(user_id):
+    return await run_db(get_user_profile_sync, user_id)
+
+def _fetch_admin_flag(user_id):
+    row = db_fetch_one_prepared_sync('admin_flag', (user_id,))
+    return bool(row and row['is_admin'])
+
+async def is_admin_user(user_id):
+    """True if the user is flagged as admin, cached for five minutes"""
+    user_id = str(user_id)
+    return await run_db(cache_get_or_set, ADMIN_FLAG_CACHE, user_id, lambda: _fetch_admin_flag(user_id))
+
 def get_display_name(user_data):
     if user_data and user_data.get('anonymous_name'):
         return user_data['anonymous_name']
@@ -924,32 +1441,29 @@ def get_display_sex(user_data):
     return '👤'
 
 def get_user_rank(user_id):
-    users = db_fetch_all('''
-        SELECT user_id, 
-               (SELECT COUNT(*) FROM posts WHERE author_id = users.user_id AND approved = TRUE) + 
-               (SELECT COUNT(*) FROM comments WHERE author_id = users.user_id) AS total
-        FROM users
-        ORDER BY total DESC
-    ''')
-    
-    for rank, user in enumerate(users, start=1):
-        if user['user_id'] == user_id:
-            return rank
-    return None
+    """1-based leaderboard position of a user, memoized for a minute"""
+    return cache_get_or_set(USER_RANK_CACHE, user_id, lambda: _fetch_user_rank(user_id))
+
+def _fetch_user_rank(user_id):
+    row = db_fetch_one_prepared_sync('user_rank', (user_id,))
+    return row['rank'] if row else None
+
+def get_top_users():
+    """Top 10 contributors by the trigger-maintained contribution_count, cached for a minute"""
+    return cache_get_or_set(LEADERBOARD_CACHE, 'top', lambda: db_fetch_all_sync(
+        "SELECT user_id, anonymous_name, sex, contribution_count AS total FROM users "
+        "ORDER BY contribution_count DESC LIMIT 10"
+    ))
 
 async def update_channel_post_comment_count(context: ContextTypes.DEFAULT_TYPE, post_id: int):
     """Update the comment count on the channel post"""
     try:
-        # Get the post details
-        post = db_fetch_one("SELECT channel_message_id, comment_count FROM posts WHERE post_id = %s", (post_id,))
+        # Get the post details (comment_count is maintained by the comments trigger)
+        post = await db_fetch_one("SELECT channel_message_id, comment_count FROM posts WHERE post_id = %s", (post_id,))
         if not post or not post['channel_message_id']:
             return
         
-        # Count all comments for this post
-        total_comments = count_all_comments(post_id)
-        
-        # Update the database with the new count
-        db_execute("UPDATE posts SET comment_count = %s WHERE post_id = %s", (total_comments, post_id))
+        total_comments = post['comment_count'] or 0
         
         # Update the channel message button
         keyboard = InlineKeyboardMarkup([
@@ -964,9 +1478,9 @@ async def update_channel_post_comment_count(context: ContextTypes.DEFAULT_TYPE,
         )
     except BadRequest as e:
         if "message is not modified" not in str(e).lower():
-            logger.error(f"Failed to update comment count in channel: {e}")
+            logger.error("Failed to update comment count in channel: %s", e)
     except Exception as e:
-        logger.error(f"Error updating channel post comment count: {e}")
+        logger.error("Error updating channel post comment count: %s", e)
 
 async def show_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
@@ -989,17 +1503,10 @@ async def show_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await animated_loading(loading_msg, "Loading leaderboard", 3)
     
     # Get top 10 users
-    top_users = db_fetch_all('''
-        SELECT user_id, anonymous_name, sex,
-               (SELECT COUNT(*) FROM posts WHERE author_id = users.user_id AND approved = TRUE) + 
-               (SELECT COUNT(*) FROM comments WHERE author_id = users.user_id) AS total
-        FROM users
-        ORDER BY total DESC
-        LIMIT 10
-    ''')
+    top_users = await run_db(get_top_users) or []
     
-    # Create clean header
-    leaderboard_text = "*🏆 Christian Vent Leaderboard*\n\n"
+    # Create clean header; lines are collected and joined once at the end
+    leaderboard_parts = ["*🏆 Christian Vent Leaderboard*\n\n"]
     
     # Define medal emojis for top 3
     medal_emojis = {1: "🥇", 2: "🥈", 3: "🥉"}
@@ -1015,7 +1522,7 @@ async def show_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
         else:
             rank_prefix = f"{idx}."
         
-        leaderboard_text += (
+        leaderboard_parts.append(
             f"{rank_prefix} {user['sex']} "
             f"[{user['anonymous_name']}]({profile_link})\n"
             f"   {user['total']} pts {aura}\n\n"
@@ -1023,28 +1530,23 @@ async def show_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Add current user's rank
     user_id = str(update.effective_user.id)
-    user_rank = get_user_rank(user_id)
+    user_rank = await run_db(get_user_rank, user_id)
     
     if user_rank:
-        user_data = db_fetch_one("SELECT anonymous_name, sex FROM users WHERE user_id = %s", (user_id,))
+        user_data = await get_user_profile(user_id)
         if user_data:
-            user_contributions = calculate_user_rating(user_id)
+            user_contributions = await run_db(calculate_user_rating, user_id)
             aura = format_aura(user_contributions)
             profile_link = f"https://t.me/{BOT_USERNAME}?start=profileid_{user_id}"
             
-            leaderboard_text += f"*Your position:* {user_rank}\n"
-            leaderboard_text += f"{user_data['sex']} {user_data['anonymous_name']} • {user_contributions} pts {aura}\n\n"
+            leaderboard_parts.append(f"*Your position:* {user_rank}\n")
+            leaderboard_parts.append(f"{user_data['sex']} {user_data['anonymous_name']} • {user_contributions} pts {aura}\n\n")
     
     # Add subtle footer
-    leaderboard_text += "_Click names to view profiles • Updated daily_"
-    
-    # Create clean buttons
-    keyboard = [
-        [InlineKeyboardButton("📱 Menu", callback_data='menu')],
-        [InlineKeyboardButton("👤 My Profile", callback_data='profile')]
-    ]
+    leaderboard_parts.append("_Click names to view profiles • Updated daily_")
+    leaderboard_text = "".join(leaderboard_parts)
     
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = LEADERBOARD_NAV_MARKUP
     
     # Replace loading message with content
     try:
@@ -1080,7 +1582,7 @@ async def show_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         disable_web_page_preview=True
                     )
     except Exception as e:
-        logger.error(f"Error showing leaderboard: {e}")
+        logger.error("Error showing leaderboard: %s", e)
         if loading_msg:
             try:
                 await loading_msg.edit_text("❌ Error loading leaderboard. Please try again.")
@@ -1091,7 +1593,12 @@ async def show_settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
     
     try:
-        user = db_fetch_one("SELECT notifications_enabled, privacy_public, is_admin FROM users WHERE user_id = %s", (user_id,))
+        # Settings only change through the toggles below, which refresh this cache
+        user = context.user_data.get('settings')
+        if user is None:
+            user = await db_fetch_one_prepared('user_settings', (user_id,))
+            if user:
+                context.user_data['settings'] = user
         
         if not user:
             if update.message:
@@ -1100,30 +1607,10 @@ async def show_settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await update.callback_query.message.reply_text("Please use /start first to initialize your profile.")
             return
         
-        notifications_status = "✅ ON" if user['notifications_enabled'] else "❌ OFF"
-        privacy_status = "🌍 Public" if user['privacy_public'] else "🔒 Private"
-        
-        keyboard = [
-            [
-                InlineKeyboardButton(f"🔔 Notifications: {notifications_status}", 
-                                   callback_data='toggle_notifications')
-            ],
-            [
-                InlineKeyboardButton(f"👁‍🗨 Privacy: {privacy_status}", 
-                                   callback_data='toggle_privacy')
-            ],
-            [
-                InlineKeyboardButton("📱 Main Menu", callback_data='menu'),
-                InlineKeyboardButton("👤 Profile", callback_data='profile')
-            ]
+        reply_markup = SETTINGS_MARKUPS[
+            bool(user['notifications_enabled']), bool(user['privacy_public']), bool(user['is_admin'])
         ]
         
-        # Add admin panel button if user is admin
-        if user['is_admin']:
-            keyboard.insert(0, [InlineKeyboardButton("🛠 Admin Panel", callback_data='admin_panel')])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         if update.callback_query:
             try:
                 await update.callback_query.edit_message_text(
@@ -1145,36 +1632,26 @@ async def show_settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             
     except Exception as e:
-        logger.error(f"Error in show_settings: {e}")
+        logger.error("Error in show_settings: %s", e)
         if update.message:
             await update.message.reply_text("❌ Error loading settings. Please try again.")
         elif update.callback_query:
             await update.callback_query.message.reply_text("❌ Error loading settings. Please try again.")
 
 async def send_post_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE, post_content: str, category: str, media_type: str = 'text', media_id: str = None, thread_from_post_id: int = None):
-    keyboard = [
-        [
-            InlineKeyboardButton("✏️ Edit", callback_data='edit_post'),
-            InlineKeyboardButton("❌ Cancel", callback_data='cancel_post')
-        ],
-        [
-            InlineKeyboardButton("✅ Submit", callback_data='confirm_post')
-        ]
-    ]
-    
     thread_text = ""
     if thread_from_post_id:
-        thread_post = db_fetch_one("SELECT content, channel_message_id FROM posts WHERE post_id = %s", (thread_from_post_id,))
+        thread_post = await db_fetch_one("SELECT content, channel_message_id FROM posts WHERE post_id = %s", (thread_from_post_id,))
         if thread_post:
             thread_preview = thread_post['content'][:100] + '...' if len(thread_post['content']) > 100 else thread_post['content']
             if thread_post['channel_message_id']:
-                thread_text = f"🔄 *Thread continuation from your previous post:*\n{escape_markdown(thread_preview, version=2)}\n\n"
+                thread_text = f"🔄 *Thread continuation from your previous post:*\n{escape_markdown_v2(thread_preview)}\n\n"
             else:
-                thread_text = f"🔄 *Threading from previous post:*\n{escape_markdown(thread_preview, version=2)}\n\n"
+                thread_text = f"🔄 *Threading from previous post:*\n{escape_markdown_v2(thread_preview)}\n\n"
     
     preview_text = (
         f"{thread_text}📝 *Post Preview* [{category}]\n\n"
-        f"{escape_markdown(post_content, version=2)}\n\n"
+        f"{escape_markdown_v2(post_content)}\n\n"
         f"Please confirm your post:"
     )
     
@@ -1187,26 +1664,28 @@ async def send_post_confirmation(update: Update, context: ContextTypes.DEFAULT_T
         'timestamp': time.time()
     }
     
+    reply_markup = POST_CONFIRM_MARKUP
+
     try:
         if update.callback_query:
             if media_type == 'text':
                 await update.callback_query.edit_message_text(
                     preview_text,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.MARKDOWN_V2
                 )
             else:
                 # For media messages, edit the caption instead of text
                 await update.callback_query.edit_message_caption(
                     caption=preview_text,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.MARKDOWN_V2
                 )
         else:
             if media_type == 'text':
                 await update.message.reply_text(
                     preview_text,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.MARKDOWN_V2
                 )
             else:
@@ -1215,18 +1694,18 @@ async def send_post_confirmation(update: Update, context: ContextTypes.DEFAULT_T
                     await update.message.reply_photo(
                         photo=media_id,
                         caption=preview_text,
-                        reply_markup=InlineKeyboardMarkup(keyboard),
+                        reply_markup=reply_markup,
                         parse_mode=ParseMode.MARKDOWN_V2
                     )
                 elif media_type == 'voice':
                     await update.message.reply_voice(
                         voice=media_id,
                         caption=preview_text,
-                        reply_markup=InlineKeyboardMarkup(keyboard),
+                        reply_markup=reply_markup,
                         parse_mode=ParseMode.MARKDOWN_V2
                     )
     except Exception as e:
-        logger.error(f"Error in send_post_confirmation: {e}")
+        logger.error("Error in send_post_confirmation: %s", e)
         
         # Fallback for callback queries with media
         if update.callback_query and media_type != 'text':
@@ -1234,13 +1713,13 @@ async def send_post_confirmation(update: Update, context: ContextTypes.DEFAULT_T
                 # Try to send as a new message instead
                 await update.callback_query.message.reply_text(
                     f"📝 *Post Preview* [{category}]\n\n"
-                    f"{escape_markdown(post_content, version=2)}\n\n"
+                    f"{escape_markdown_v2(post_content)}\n\n"
                     f"Please confirm your post:",
-                    reply_markup=InlineKeyboardMarkup(keyboard),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.MARKDOWN_V2
                 )
             except Exception as e2:
-                logger.error(f"Fallback also failed: {e2}")
+                logger.error("Fallback also failed: %s", e2)
                 
         elif update.message:
             await update.message.reply_text("❌ Error showing confirmation. Please try again.")
@@ -1249,45 +1728,56 @@ async def send_post_confirmation(update: Update, context: ContextTypes.DEFAULT_T
 
 async def notify_user_of_reply(context: ContextTypes.DEFAULT_TYPE, post_id: int, comment_id: int, replier_id: str):
     try:
-        comment = db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
-        if not comment:
-            return
-        
-        original_author = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (comment['author_id'],))
-        if not original_author or not original_author['notifications_enabled']:
+        # Replied-to comment, its author's opt-in, the replier's name and the post in one round trip
+        reply_info = await db_fetch_one('''
+            SELECT c.content AS comment_content, c.author_id, oa.notifications_enabled,
+                   r.anonymous_name, p.content AS post_content
+            FROM comments c
+            JOIN users oa ON oa.user_id = c.author_id
+            JOIN posts p ON p.post_id = %s
+            LEFT JOIN users r ON r.user_id = %s
+            WHERE c.comment_id = %s
+        ''', (post_id, replier_id, comment_id))
+        if not reply_info or not reply_info['notifications_enabled']:
             return
         
-        replier = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (replier_id,))
-        replier_name = get_display_name(replier)
-        
-        post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
-        post_preview = post['content'][:50] + '...' if len(post['content']) > 50 else post['content']
+        replier_name = get_display_name(reply_info)
+        post_content = reply_info['post_content']
+        post_preview = post_content[:50] + '...' if len(post_content) > 50 else post_content
         
         notification_text = (
-            f"💬 {replier_name} replied to your comment:\n\n"
-            f"🗨 {escape_markdown(comment['content'][:100], version=2)}\n\n"
-            f"📝 Post: {escape_markdown(post_preview, version=2)}\n\n"
+            f"💬 {escape_markdown_v2(replier_name)} replied to your comment:\n\n"
+            f"🗨 {escape_markdown_v2(reply_info['comment_content'][:100])}\n\n"
+            f"📝 Post: {escape_markdown_v2(post_preview)}\n\n"
             f"[View conversation](https://t.me/{BOT_USERNAME}?start=comments_{post_id})"
         )
         
         await context.bot.send_message(
-            chat_id=original_author['user_id'],
+            chat_id=reply_info['author_id'],
             text=notification_text,
             parse_mode=ParseMode.MARKDOWN_V2
         )
     except Exception as e:
-        logger.error(f"Error sending reply notification: {e}")
+        logger.error("Error sending reply notification: %s", e)
 
-async def notify_admin_of_new_post(context: ContextTypes.DEFAULT_TYPE, post_id: int):
-    if not ADMIN_ID:
+async def notify_admin_of_new_post(context: ContextTypes.DEFAULT_TYPE, post_id: int, post=None, author_name=None):
+    """Ask the admins to review a post (pass post/author_name when the caller already has them)"""
+    if not ADMIN_IDS:
         return
     
-    post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+    if post is None:
+        # Post and its author's name in one round trip
+        post = await db_fetch_one(
+            "SELECT p.*, u.anonymous_name FROM posts p LEFT JOIN users u ON u.user_id = p.author_id WHERE p.post_id = %s",
+            (post_id,)
+        )
+        if post and author_name is None:
+            author_name = get_display_name(post)
     if not post:
         return
     
-    author = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (post['author_id'],))
-    author_name = get_display_name(author)
+    if author_name is None:
+        author_name = get_display_name(await get_user_profile(post['author_id']))
     
     post_preview = post['content'][:100] + '...' if len(post['content']) > 100 else post['content']
     
@@ -1298,31 +1788,34 @@ async def notify_admin_of_new_post(context: ContextTypes.DEFAULT_TYPE, post_id:
         ]
     ])
     
-    try:
-        await context.bot.send_message(
-            chat_id=ADMIN_ID,
+    results = await asyncio.gather(*(
+        send_limited(context.bot.send_message(
+            chat_id=admin_id,
             text=f"🆕 New post awaiting approval from {author_name}:\n\n{post_preview}",
             reply_markup=keyboard
-        )
-    except Exception as e:
-        logger.error(f"Error notifying admin: {e}")
+        ))
+        for admin_id in ADMIN_IDS
+    ), return_exceptions=True)
+    for admin_id, result in zip(ADMIN_IDS, results):
+        if isinstance(result, Exception):
+            logger.error("Error notifying admin %s: %s", admin_id, result)
 
 # Update the submit vent endpoint to use this
 async def notify_user_of_private_message(context: ContextTypes.DEFAULT_TYPE, sender_id: str, receiver_id: str, message_content: str, message_id: int):
     try:
         # Check if receiver has blocked the sender
-        is_blocked = db_fetch_one(
-            "SELECT * FROM blocks WHERE blocker_id = %s AND blocked_id = %s",
+        is_blocked = await db_fetch_one(
+            "SELECT 1 FROM blocks WHERE blocker_id = %s AND blocked_id = %s LIMIT 1",
             (receiver_id, sender_id)
         )
         if is_blocked:
             return  # Don't notify if blocked
         
-        receiver = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (receiver_id,))
+        receiver = await get_user_profile(receiver_id)
         if not receiver or not receiver['notifications_enabled']:
             return
         
-        sender = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (sender_id,))
+        sender = await get_user_profile(sender_id)
         sender_name = get_display_name(sender)
         
         # Truncate long messages for the notification
@@ -1330,8 +1823,8 @@ async def notify_user_of_private_message(context: ContextTypes.DEFAULT_TYPE, sen
         
         notification_text = (
             f"📩 *New Private Message*\n\n"
-            f"👤 From: {escape_markdown(sender_name, version=2)}\n\n"
-            f"💬 {escape_markdown(preview_content, version=2)}\n\n"
+            f"👤 From: {escape_markdown_v2(sender_name)}\n\n"
+            f"💬 {escape_markdown_v2(preview_content)}\n\n"
             f"💭 _Use /inbox to view all messages_"
         )
         
@@ -1350,7 +1843,7 @@ async def notify_user_of_private_message(context: ContextTypes.DEFAULT_TYPE, sen
             reply_markup=keyboard
         )
     except Exception as e:
-        logger.error(f"Error sending private message notification: {e}")
+        logger.error("Error sending private message notification: %s", e)
 
 
 
@@ -1358,8 +1851,7 @@ async def notify_user_of_private_message(context: ContextTypes.DEFAULT_TYPE, sen
 
 async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         if update.message:
             await update.message.reply_text("❌ You don't have permission to access this.")
         elif update.callback_query:
@@ -1367,13 +1859,13 @@ async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Get statistics for display
-    pending_posts = db_fetch_one("SELECT COUNT(*) as count FROM posts WHERE approved = FALSE")
+    pending_posts = await db_fetch_one("SELECT COUNT(*) as count FROM posts WHERE approved = FALSE")
     pending_count = pending_posts['count'] if pending_posts else 0
     
-    total_users = db_fetch_one("SELECT COUNT(*) as count FROM users")
+    total_users = await db_fetch_one("SELECT COUNT(*) as count FROM users")
     users_count = total_users['count'] if total_users else 0
     
-    active_today = db_fetch_one('''
+    active_today = await db_fetch_one('''
         SELECT COUNT(DISTINCT user_id) as count 
         FROM (
             SELECT author_id as user_id FROM posts WHERE DATE(timestamp) = CURRENT_DATE
@@ -1400,21 +1892,23 @@ async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"Select an option below:"
     )
     
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
     try:
         if update.callback_query:
             await update.callback_query.edit_message_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=reply_markup,
                 parse_mode=ParseMode.MARKDOWN
             )
         else:
             await update.message.reply_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=reply_markup,
                 parse_mode=ParseMode.MARKDOWN
             )
     except Exception as e:
-        logger.error(f"Error in admin_panel: {e}")
+        logger.error("Error in admin_panel: %s", e)
         if update.message:
             await update.message.reply_text("❌ Error loading admin panel.")
         elif update.callback_query:
@@ -1428,8 +1922,7 @@ async def start_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(query.from_user.id)
     
     # Verify admin permissions
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         await query.answer("❌ You don't have permission to access this.", show_alert=True)
         return
     
@@ -1476,8 +1969,7 @@ async def handle_broadcast_type(update: Update, context: ContextTypes.DEFAULT_TY
     user_id = str(query.from_user.id)
     
     # Verify admin permissions
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         await query.answer("❌ You don't have permission to access this.", show_alert=True)
         return
     
@@ -1528,8 +2020,7 @@ async def confirm_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Verify admin permissions
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         if is_callback:
             await update.callback_query.answer("❌ You don't have permission to access this.", show_alert=True)
         else:
@@ -1537,7 +2028,7 @@ async def confirm_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Get user count for confirmation
-    total_users = db_fetch_one("SELECT COUNT(*) as count FROM users")
+    total_users = await db_fetch_one("SELECT COUNT(*) as count FROM users")
     users_count = total_users['count'] if total_users else 0
     
     text = (
@@ -1568,16 +2059,18 @@ async def confirm_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
         ]
     ]
     
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
     if is_callback:
         await update.callback_query.edit_message_text(
             text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=reply_markup,
             parse_mode=ParseMode.MARKDOWN
         )
     else:
         await update.message.reply_text(
             text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=reply_markup,
             parse_mode=ParseMode.MARKDOWN
         )
 
@@ -1607,7 +2100,7 @@ async def execute_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     # Get all users (exclude the sender)
-    all_users = db_fetch_all("SELECT user_id FROM users WHERE user_id != %s", (user_id,))
+    all_users = await db_fetch_all("SELECT user_id FROM users WHERE user_id != %s", (user_id,))
     total_users = len(all_users)
     
     if total_users == 0:
@@ -1701,10 +2194,10 @@ async def execute_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 blocked_count += 1
             else:
                 failed_count += 1
-                logger.error(f"Failed to send broadcast to {user['user_id']}: {e}")
+                logger.error("Failed to send broadcast to %s: %s", user['user_id'], e)
         except Exception as e:
             failed_count += 1
-            logger.error(f"Failed to send broadcast to {user['user_id']}: {e}")
+            logger.error("Failed to send broadcast to %s: %s", user['user_id'], e)
     
     # Broadcast complete
     completion_time = datetime.now().strftime("%H:%M:%S")
@@ -1731,15 +2224,9 @@ async def execute_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"🎯 _Broadcast delivered to {success_count} active users._"
     )
     
-    keyboard = [
-        [InlineKeyboardButton("📊 Send Another", callback_data='admin_broadcast')],
-        [InlineKeyboardButton("🛠️ Admin Panel", callback_data='admin_panel')],
-        [InlineKeyboardButton("📱 Main Menu", callback_data='menu')]
-    ]
-    
     await status_message.edit_text(
         report_text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=BROADCAST_DONE_MARKUP,
         parse_mode=ParseMode.MARKDOWN
     )
 async def advanced_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1750,14 +2237,13 @@ async def advanced_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = str(query.from_user.id)
     
     # Verify admin permissions
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         await query.answer("❌ You don't have permission to access this.", show_alert=True)
         return
     
     # Get user statistics for targeting
-    total_users = db_fetch_one("SELECT COUNT(*) as count FROM users")
-    active_users = db_fetch_one('''
+    total_users = await db_fetch_one("SELECT COUNT(*) as count FROM users")
+    active_users = await db_fetch_one('''
         SELECT COUNT(DISTINCT user_id) as count 
         FROM (
             SELECT author_id as user_id FROM posts WHERE DATE(timestamp) >= CURRENT_DATE - INTERVAL '7 days'
@@ -1802,8 +2288,7 @@ async def show_pending_posts(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = str(update.effective_user.id)
     
     # Verify admin permissions
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         if update.message:
             await update.message.reply_text("❌ You don't have permission to access this.")
         elif update.callback_query:
@@ -1811,7 +2296,7 @@ async def show_pending_posts(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
     
     # Get pending posts (simplified - no JOIN with pending_notifications)
-    posts = db_fetch_all("""
+    posts = await db_fetch_all("""
         SELECT p.post_id, p.content, p.category, u.anonymous_name, p.media_type, p.media_id
         FROM posts p
         JOIN users u ON p.author_id = u.user_id
@@ -1826,6 +2311,8 @@ async def show_pending_posts(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.message.reply_text("✅ No pending posts!")
         return
     
+    reply_target = update.callback_query.message if update.callback_query else update.message
+    
     # Send each pending post to admin
     for post in posts[:10]:  # Limit to 10 posts to avoid flooding
         keyboard = InlineKeyboardMarkup([
@@ -1840,90 +2327,71 @@ async def show_pending_posts(update: Update, context: ContextTypes.DEFAULT_TYPE)
         
         try:
             if post['media_type'] == 'text':
-                if update.callback_query:
-                    await update.callback_query.message.reply_text(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-                else:
-                    await update.message.reply_text(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
+                await reply_target.reply_text(
+                    text,
+                    reply_markup=keyboard,
+                    parse_mode=ParseMode.MARKDOWN
+                )
             elif post['media_type'] == 'photo':
-                if update.callback_query:
-                    await update.callback_query.message.reply_photo(
-                        photo=post['media_id'],
-                        caption=text,
-                        reply_markup=keyboard,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-                else:
-                    await update.message.reply_photo(
-                        photo=post['media_id'],
-                        caption=text,
-                        reply_markup=keyboard,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-            elif post['media_type'] == 'voice':
-                if update.callback_query:
-                    await update.callback_query.message.reply_voice(
-                        voice=post['media_id'],
-                        caption=text,
-                        reply_markup=keyboard,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-                else:
-                    await update.message.reply_voice(
-                        voice=post['media_id'],
-                        caption=text,
-                        reply_markup=keyboard,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-        except Exception as e:
-            logger.error(f"Error sending pending post {post['post_id']}: {e}")
-            # Send as text if media fails
-            if update.callback_query:
-                await update.callback_query.message.reply_text(
-                    f"❌ Error loading media for post {post['post_id']}\n\n{text}",
+                await reply_target.reply_photo(
+                    photo=post['media_id'],
+                    caption=text,
                     reply_markup=keyboard,
                     parse_mode=ParseMode.MARKDOWN
                 )
-            else:
-                await update.message.reply_text(
-                    f"❌ Error loading media for post {post['post_id']}\n\n{text}",
+            elif post['media_type'] == 'voice':
+                await reply_target.reply_voice(
+                    voice=post['media_id'],
+                    caption=text,
                     reply_markup=keyboard,
                     parse_mode=ParseMode.MARKDOWN
                 )
+        except Exception as e:
+            logger.error("Error sending pending post %s: %s", post['post_id'], e)
+            # Send as text if media fails
+            await reply_target.reply_text(
+                f"❌ Error loading media for post {post['post_id']}\n\n{text}",
+                reply_markup=keyboard,
+                parse_mode=ParseMode.MARKDOWN
+            )
 
 async def approve_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_id: int):
     query = update.callback_query
     user_id = str(update.effective_user.id)
     
     # Verify admin permissions
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         try:
             await query.answer("❌ You don't have permission to do this.", show_alert=True)
         except:
             await query.edit_message_text("❌ You don't have permission to do this.")
         return
     
-    # Get the post
-    post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+    # Post row and approval info share one pooled connection; it is released before any Telegram call
+    async with db_session():
+        post = await get_post(post_id)
+        if post and not post['approved']:
+            # Next vent number and (for thread continuations) the original's channel message in one round trip
+            approval_info = await db_fetch_one('''
+                SELECT (SELECT MAX(vent_number) FROM posts WHERE approved = TRUE) AS max_num,
+                       (SELECT channel_message_id FROM posts WHERE post_id = %s) AS thread_message_id
+            ''', (post['thread_from_post_id'],))
     if not post:
         try:
             await query.answer("❌ Post not found.", show_alert=True)
         except:
             await query.edit_message_text("❌ Post not found.")
         return
+    if post['approved']:
+        await query.answer("ℹ️ This post is already approved.", show_alert=True)
+        return
+    if approval_info is None:
+        # Without the current max the vent number would restart at 001 - publish nothing
+        await query.answer("❌ Failed to approve post. Please try again.", show_alert=True)
+        return
     
     try:
-        # Get the next vent number FIRST
-        max_vent = db_fetch_one("SELECT MAX(vent_number) as max_num FROM posts WHERE approved = TRUE")
-        next_vent_number = (max_vent['max_num'] or 0) + 1
+        next_vent_number = (approval_info['max_num'] or 0) + 1
         
         # Format the post content for the channel with vent number
         hashtag = f"#{post['category']}"
@@ -1944,66 +2412,60 @@ async def approve_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_
             [InlineKeyboardButton(f"💬 Comments (0)", url=f"https://t.me/{BOT_USERNAME}?start=comments_{post_id}")]
         ])
         
-        # Check if this is a thread continuation
-        reply_to_message_id = None
-        if post['thread_from_post_id']:
-            # Get the original post's channel message ID
-            original_post = db_fetch_one(
-                "SELECT channel_message_id FROM posts WHERE post_id = %s", 
-                (post['thread_from_post_id'],)
-            )
-            if original_post and original_post['channel_message_id']:
-                reply_to_message_id = original_post['channel_message_id']
+        # Thread continuations reply to the original post in the channel
+        reply_to_message_id = approval_info['thread_message_id']
         
         # Send post to channel based on media type
+        send_kwargs = dict(
+            chat_id=CHANNEL_ID,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=kb,
+            reply_to_message_id=reply_to_message_id
+        )
         if post['media_type'] == 'text':
-            msg = await context.bot.send_message(
-                chat_id=CHANNEL_ID,
-                text=caption_text,
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=kb,
-                reply_to_message_id=reply_to_message_id
-            )
+            msg = await context.bot.send_message(text=caption_text, **send_kwargs)
         elif post['media_type'] == 'photo':
-            msg = await context.bot.send_photo(
-                chat_id=CHANNEL_ID,
-                photo=post['media_id'],
-                caption=caption_text,
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=kb,
-                reply_to_message_id=reply_to_message_id
-            )
+            msg = await context.bot.send_photo(photo=post['media_id'], caption=caption_text, **send_kwargs)
         elif post['media_type'] == 'voice':
-            msg = await context.bot.send_voice(
-                chat_id=CHANNEL_ID,
-                voice=post['media_id'],
-                caption=caption_text,
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=kb,
-                reply_to_message_id=reply_to_message_id
-            )
+            msg = await context.bot.send_voice(voice=post['media_id'], caption=caption_text, **send_kwargs)
         else:
             await query.answer("❌ Unsupported media type.", show_alert=True)
             return
         
-        # Update the post in database with vent number
-        success = db_execute(
-            "UPDATE posts SET approved = TRUE, admin_approved_by = %s, channel_message_id = %s, vent_number = %s WHERE post_id = %s",
-            (user_id, msg.message_id, next_vent_number, post_id)
+        # Record the approval only if no other admin got there first; the author comes back with it
+        approved_rows = await db_execute(
+            "UPDATE posts SET approved = TRUE, admin_approved_by = %s, channel_message_id = %s, vent_number = %s "
+            "WHERE post_id = %s AND approved = FALSE RETURNING author_id",
+            (user_id, msg.message_id, next_vent_number, post_id),
+            fetch=True
         )
         
-        if not success:
+        cache_invalidate(POST_CACHE, post_id)
+        if approved_rows is None:
             await query.answer("❌ Failed to update database.", show_alert=True)
             return
+        if not approved_rows:
+            # Lost the race: take our duplicate back out of the channel
+            try:
+                await context.bot.delete_message(chat_id=CHANNEL_ID, message_id=msg.message_id)
+            except Exception as e:
+                logger.error("Error removing duplicate channel post %s: %s", post_id, e)
+            await query.answer("ℹ️ This post was already approved by another admin.", show_alert=True)
+            return
+        author_id = approved_rows[0]['author_id']
+        cache_invalidate(RATING_CACHE, author_id)
         
-        # Notify the author
-        try:
-            await context.bot.send_message(
-                chat_id=post['author_id'],
-                text="✅ Your post has been approved and published!"
-            )
-        except Exception as e:
-            logger.error(f"Error notifying author: {e}")
+        async def notify_author():
+            try:
+                await context.bot.send_message(
+                    chat_id=author_id,
+                    text="✅ Your post has been approved and published!"
+                )
+            except Exception as e:
+                logger.error("Error notifying author: %s", e)
+        
+        # The admin's confirmation below doesn't wait on the author's notice
+        context.application.create_task(notify_author())
         
         # =============================================
         # CRITICAL FIX: Update the admin's original message to remove Approve/Reject buttons
@@ -2024,7 +2486,7 @@ async def approve_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_
             
         except BadRequest as e:
             # If editing fails, at least reply with success message
-            logger.error(f"Error updating admin message: {e}")
+            logger.error("Error updating admin message: %s", e)
             await query.answer("✅ Post approved and published!", show_alert=True)
             await query.message.reply_text(
                 f"✅ Post #{post_id} approved and published as {vent_display}!",
@@ -2036,7 +2498,7 @@ async def approve_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_
         # =============================================
         
     except Exception as e:
-        logger.error(f"Error approving post: {e}")
+        logger.error("Error approving post: %s", e)
         try:
             await query.answer(f"❌ Failed to approve post: {str(e)}", show_alert=True)
         except:
@@ -2051,8 +2513,7 @@ async def reject_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_i
     user_id = str(update.effective_user.id)
     
     # Verify admin permissions
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         try:
             await query.answer("❌ You don't have permission to do this.", show_alert=True)
         except:
@@ -2060,7 +2521,7 @@ async def reject_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_i
         return
     
     # Get the post
-    post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+    post = await get_post(post_id)
     if not post:
         try:
             await query.answer("❌ Post not found.", show_alert=True)
@@ -2069,22 +2530,24 @@ async def reject_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_i
         return
     
     try:
-        # Notify the author
-        try:
-            await context.bot.send_message(
-                chat_id=post['author_id'],
-                text="❌ Your post was not approved by the admin."
-            )
-        except Exception as e:
-            logger.error(f"Error notifying author: {e}")
+        async def notify_author():
+            try:
+                await context.bot.send_message(
+                    chat_id=post['author_id'],
+                    text="❌ Your post was not approved by the admin."
+                )
+            except Exception as e:
+                logger.error("Error notifying author: %s", e)
         
-        # Delete the post from database
-        success = db_execute("DELETE FROM posts WHERE post_id = %s", (post_id,))
+        success = await delete_post_cascade(post_id)
         
         if not success:
             await query.answer("❌ Failed to delete post from database.", show_alert=True)
             return
         
+        # Only tell the author once the post is really gone; the admin's message needn't wait on it
+        context.application.create_task(notify_author())
+        
         # =============================================
         # FIX: Update the admin's message to show it's rejected
         # =============================================
@@ -2104,7 +2567,7 @@ async def reject_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_i
             await query.message.reply_text("❌ Post rejected and deleted")
         
     except Exception as e:
-        logger.error(f"Error rejecting post: {e}")
+        logger.error("Error rejecting post: %s", e)
         try:
             await query.answer(f"❌ Failed to reject post: {str(e)}", show_alert=True)
         except:
@@ -2113,19 +2576,11 @@ async def reject_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_i
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
     
-    # Check if user exists and create if not - FIXED
-    user = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (user_id,))
+    # Check if user exists and create if not
+    user = await get_or_create_user(user_id)
     if not user:
-        anon = create_anonymous_name(user_id)
-        # FIXED: Properly set is_admin based on ADMIN_ID comparison
-        is_admin = str(user_id) == str(ADMIN_ID)
-        success = db_execute(
-            "INSERT INTO users (user_id, anonymous_name, sex, is_admin) VALUES (%s, %s, %s, %s)",
-            (user_id, anon, '👤', is_admin)
-        )
-        if not success:
-            await update.message.reply_text("❌ Error creating user profile. Please try again.")
-            return
+        await update.message.reply_text("❌ Error creating user profile. Please try again.")
+        return
     
     args = context.args
 
@@ -2151,16 +2606,16 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             post_id_str = arg.split("_", 1)[1]
             if post_id_str.isdigit():
                 post_id = int(post_id_str)
-                db_execute(
+                await db_execute(
                     "UPDATE users SET waiting_for_comment = TRUE, comment_post_id = %s WHERE user_id = %s",
                     (post_id, user_id)
                 )
                 
-                post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+                post = await get_post(post_id)
                 preview_text = "Original content not found"
                 if post:
                     content = post['content'][:100] + '...' if len(post['content']) > 100 else post['content']
-                    preview_text = f"💬 *Replying to:*\n{escape_markdown(content, version=2)}"
+                    preview_text = f"💬 *Replying to:*\n{escape_markdown_v2(content)}"
                 
                 await query.message.reply_text(
                     f"{preview_text}\n\n✍️ Please type your comment or send a voice message, GIF, or sticker:\n\nTap ❌ Cancel to return to menu.",
@@ -2173,26 +2628,27 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         elif arg.startswith("profileid_"):
             target_user_id = arg.split("_", 1)[1]
             
-            user_data = db_fetch_one(
+            user_data = await db_fetch_one(
                 "SELECT * FROM users WHERE user_id = %s",
                 (target_user_id,)
             )
             
             if user_data:
-                followers = db_fetch_all(
-                    "SELECT * FROM followers WHERE followed_id = %s",
+                followers_row = await db_fetch_one(
+                    "SELECT COUNT(*) AS cnt FROM followers WHERE followed_id = %s",
                     (user_data['user_id'],)
                 )
+                followers_count = followers_row['cnt'] if followers_row else 0
                 
-                rating = calculate_user_rating(user_data['user_id'])
+                rating = await run_db(calculate_user_rating, user_data['user_id'])
                 
                 current_user_id = user_id
                 btn = []
                 
                 # Follow / Unfollow buttons
                 if user_data['user_id'] != current_user_id:
-                    is_following = db_fetch_one(
-                        "SELECT * FROM followers WHERE follower_id = %s AND followed_id = %s",
+                    is_following = await db_fetch_one(
+                        "SELECT 1 FROM followers WHERE follower_id = %s AND followed_id = %s LIMIT 1",
                         (current_user_id, user_data['user_id'])
                     )
                     
@@ -2223,7 +2679,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await update.message.reply_text(
                     f"👤 *{display_name}* 🎖 \n"
                     f"📌 Sex: {display_sex}\n\n"
-                    f"👥 Followers: {len(followers)}\n"
+                    f"👥 Followers: {followers_count}\n"
                     f"🌀 *Aura:* {format_aura(rating)} (Level {rating // 10 + 1})\n"
                     f"⭐️ Contributions: {rating}\n"
                     f"〰️〰️〰️〰️〰️〰️〰️〰️〰️〰️\n"
@@ -2238,26 +2694,11 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
     
     # Show main menu with improved buttons
-    keyboard = [
-        [
-            InlineKeyboardButton("🌟 Share My Thoughts", callback_data='ask'),
-            InlineKeyboardButton("👤 View Profile", callback_data='profile')
-        ],
-        [
-            InlineKeyboardButton("📚 My Content", callback_data='my_content_menu'),
-            InlineKeyboardButton("🏆 Leaderboard", callback_data='leaderboard')
-        ],
-        [
-            InlineKeyboardButton("⚙️ Settings", callback_data='settings'),
-            InlineKeyboardButton("❓ Help", callback_data='help')
-        ]
-    ]
-    
     await update.message.reply_text(
         "✝️ *እንኳን ወደ Christian vent በሰላም መጡ* ✝️\n"
         "━━━━━━━━━━━━━━━━━━━━━\n\n"
         "ማንነታችሁ ሳይገለጽ ሃሳባችሁን ማጋራት ትችላላችሁ.\n\n የሚከተሉትን ምረጡ :",
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=MAIN_MENU_MARKUP,
         parse_mode=ParseMode.MARKDOWN
     )
     
@@ -2285,7 +2726,7 @@ async def show_inbox(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1)
         await animated_loading(loading_msg, "Loading", 1)
     
     # Get unread messages count
-    unread_count_row = db_fetch_one(
+    unread_count_row = await db_fetch_one(
         "SELECT COUNT(*) as count FROM private_messages WHERE receiver_id = %s AND is_read = FALSE",
         (user_id,)
     )
@@ -2296,7 +2737,7 @@ async def show_inbox(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1)
     offset = (page - 1) * per_page
     
     # Get messages with pagination
-    messages = db_fetch_all('''
+    messages = await db_fetch_all('''
         SELECT pm.*, u.anonymous_name as sender_name, u.sex as sender_sex
         FROM private_messages pm
         JOIN users u ON pm.sender_id = u.user_id
@@ -2305,7 +2746,7 @@ async def show_inbox(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1)
         LIMIT %s OFFSET %s
     ''', (user_id, per_page, offset))
     
-    total_messages_row = db_fetch_one(
+    total_messages_row = await db_fetch_one(
         "SELECT COUNT(*) as count FROM private_messages WHERE receiver_id = %s",
         (user_id,)
     )
@@ -2326,12 +2767,7 @@ async def show_inbox(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1)
             "and clicking 'Send Message'."
         )
         
-        keyboard = [
-            [InlineKeyboardButton("🔍 View Leaderboard", callback_data='leaderboard')],
-            [InlineKeyboardButton("📱 Main Menu", callback_data='menu')]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = EMPTY_INBOX_MARKUP
         
         try:
             if loading_msg:
@@ -2354,7 +2790,7 @@ async def show_inbox(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1)
                         parse_mode=ParseMode.MARKDOWN
                     )
         except Exception as e:
-            logger.error(f"Error showing empty inbox: {e}")
+            logger.error("Error showing empty inbox: %s", e)
         return
     
     # Build clean inbox header
@@ -2479,7 +2915,7 @@ async def show_inbox(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1)
                         parse_mode=ParseMode.MARKDOWN
                     )
     except Exception as e:
-        logger.error(f"Error showing inbox: {e}")
+        logger.error("Error showing inbox: %s", e)
         if hasattr(update, 'message') and update.message:
             await update.message.reply_text("❌ Error loading inbox. Please try again.")
 async def view_individual_message(update: Update, context: ContextTypes.DEFAULT_TYPE, message_id: int, from_page=1):
@@ -2493,7 +2929,7 @@ async def view_individual_message(update: Update, context: ContextTypes.DEFAULT_
     await typing_animation(context, query.message.chat_id, 0.3)
     
     # Get message details
-    message = db_fetch_one('''
+    message = await db_fetch_one('''
         SELECT pm.*, u.anonymous_name as sender_name, u.sex as sender_sex, u.user_id as sender_id
         FROM private_messages pm
         JOIN users u ON pm.sender_id = u.user_id
@@ -2511,7 +2947,7 @@ async def view_individual_message(update: Update, context: ContextTypes.DEFAULT_
         return
     
     # Mark message as read
-    db_execute(
+    await db_execute(
         "UPDATE private_messages SET is_read = TRUE WHERE message_id = %s",
         (message_id,)
     )
@@ -2548,7 +2984,7 @@ async def view_individual_message(update: Update, context: ContextTypes.DEFAULT_
     text = (
         f"💬 *Message from {message['sender_name']}*\n"
         f"_{time_ago}_\n\n"
-        f"{escape_markdown(message['content'], version=2)}\n\n"
+        f"{escape_markdown_v2(message['content'])}\n\n"
         f"━━━━━━━━━━━━━━━━━━━━━"
     )
     
@@ -2577,7 +3013,7 @@ async def view_individual_message(update: Update, context: ContextTypes.DEFAULT_
             parse_mode=ParseMode.MARKDOWN_V2
         )
     except Exception as e:
-        logger.error(f"Error viewing message: {e}")
+        logger.error("Error viewing message: %s", e)
         try:
             await query.message.reply_text(
                 f"💬 Message from {message['sender_name']}:\n\n"
@@ -2596,7 +3032,7 @@ async def delete_message(update: Update, context: ContextTypes.DEFAULT_TYPE, mes
     user_id = str(query.from_user.id)
     
     # Get message preview for confirmation
-    message = db_fetch_one('''
+    message = await db_fetch_one('''
         SELECT pm.content, u.anonymous_name as sender_name
         FROM private_messages pm
         JOIN users u ON pm.sender_id = u.user_id
@@ -2641,7 +3077,7 @@ async def confirm_delete_message(update: Update, context: ContextTypes.DEFAULT_T
     await asyncio.sleep(0.5)
     
     # Delete the message
-    success = db_execute(
+    success = await db_execute(
         "DELETE FROM private_messages WHERE message_id = %s AND receiver_id = %s",
         (message_id, user_id)
     )
@@ -2669,7 +3105,7 @@ async def mark_all_read(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(query.from_user.id)
     
     # Mark all as read
-    db_execute(
+    await db_execute(
         "UPDATE private_messages SET is_read = TRUE WHERE receiver_id = %s",
         (user_id,)
     )
@@ -2680,7 +3116,7 @@ async def show_messages(update: Update, context: ContextTypes.DEFAULT_TYPE, page
     user_id = str(update.effective_user.id)
     
     # Mark messages as read when viewing
-    db_execute(
+    await db_execute(
         "UPDATE private_messages SET is_read = TRUE WHERE receiver_id = %s",
         (user_id,)
     )
@@ -2689,7 +3125,7 @@ async def show_messages(update: Update, context: ContextTypes.DEFAULT_TYPE, page
     per_page = 5
     offset = (page - 1) * per_page
     
-    messages = db_fetch_all('''
+    messages = await db_fetch_all('''
         SELECT pm.*, u.anonymous_name as sender_name, u.sex as sender_sex
         FROM private_messages pm
         JOIN users u ON pm.sender_id = u.user_id
@@ -2698,7 +3134,7 @@ async def show_messages(update: Update, context: ContextTypes.DEFAULT_TYPE, page
         LIMIT %s OFFSET %s
     ''', (user_id, per_page, offset))
     
-    total_messages_row = db_fetch_one(
+    total_messages_row = await db_fetch_one(
         "SELECT COUNT(*) as count FROM private_messages WHERE receiver_id = %s",
         (user_id,)
     )
@@ -2718,7 +3154,7 @@ async def show_messages(update: Update, context: ContextTypes.DEFAULT_TYPE, page
             )
         return
     
-    messages_text = f"📭 *Your Messages* (Page {page}/{total_pages})\n\n"
+    messages_parts = [f"📭 *Your Messages* (Page {page}/{total_pages})\n\n"]
     
     for msg in messages:
         # Handle timestamp whether it's string or datetime object
@@ -2726,9 +3162,12 @@ async def show_messages(update: Update, context: ContextTypes.DEFAULT_TYPE, page
             timestamp = datetime.strptime(msg['timestamp'], '%Y-%m-%d %H:%M:%S').strftime('%b %d, %H:%M')
         else:
             timestamp = msg['timestamp'].strftime('%b %d, %H:%M')
-        messages_text += f"👤 *{msg['sender_name']}* {msg['sender_sex']} ({timestamp}):\n"
-        messages_text += f"{escape_markdown(msg['content'], version=2)}\n\n"
-        messages_text += f"━━━━━━━━━━━━━━━━━━━━━\n\n"
+        messages_parts.append(
+            f"👤 *{msg['sender_name']}* {msg['sender_sex']} ({timestamp}):\n"
+            f"{escape_markdown_v2(msg['content'])}\n\n"
+            f"━━━━━━━━━━━━━━━━━━━━━\n\n"
+        )
+    messages_text = "".join(messages_parts)
     
     # Build keyboard with pagination and reply options
     keyboard_buttons = []
@@ -2749,35 +3188,37 @@ async def show_messages(update: Update, context: ContextTypes.DEFAULT_TYPE, page
             InlineKeyboardButton(f"⛔ Block {msg['sender_name']}", callback_data=f"block_user_{msg['sender_id']}")
         ])
     
-    keyboard_buttons.append([InlineKeyboardButton("📱 Main Menu", callback_data='menu')])
+    keyboard_buttons.append(MAIN_MENU_ROW)
     
+    reply_markup = InlineKeyboardMarkup(keyboard_buttons)
+
     try:
         if hasattr(update, 'callback_query') and update.callback_query:
             await update.callback_query.edit_message_text(
                 messages_text,
-                reply_markup=InlineKeyboardMarkup(keyboard_buttons),
+                reply_markup=reply_markup,
                 parse_mode=ParseMode.MARKDOWN_V2
             )
         else:
             if hasattr(update, 'message') and update.message:
                 await update.message.reply_text(
                     messages_text,
-                    reply_markup=InlineKeyboardMarkup(keyboard_buttons),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.MARKDOWN_V2
                 )
     except Exception as e:
-        logger.error(f"Error showing messages: {e}")
+        logger.error("Error showing messages: %s", e)
         if hasattr(update, 'message') and update.message:
             await update.message.reply_text("❌ Error loading messages. Please try again.")
 
 async def show_comments_menu(update, context, post_id, page=1):
-    post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+    post = await get_post(post_id)
     if not post:
         if hasattr(update, 'message') and update.message:
             await update.message.reply_text("❌ Post not found.", reply_markup=main_menu)
         return
 
-    comment_count = count_all_comments(post_id)
+    comment_count = post['comment_count'] or 0
     keyboard = [
         [
             InlineKeyboardButton(f"👁 View Comments ({comment_count})", callback_data=f"viewcomments_{post_id}_{page}"),
@@ -2786,7 +3227,7 @@ async def show_comments_menu(update, context, post_id, page=1):
     ]
 
     post_text = post['content']
-    escaped_text = escape_markdown(post_text, version=2)
+    escaped_text = escape_markdown_v2(post_text)
 
     if hasattr(update, 'message') and update.message:
         await update.message.reply_text(
@@ -2795,46 +3236,57 @@ async def show_comments_menu(update, context, post_id, page=1):
             parse_mode=ParseMode.MARKDOWN_V2
         )
 
+# One C-level pass per string instead of a regex (or a replace per special character)
+_MARKDOWN_V2_TABLE = str.maketrans({c: '\\' + c for c in '\\_*[]()~`>#+-=|{}.!'})
+
 def escape_markdown_v2(text):
     """Escape all special characters for MarkdownV2"""
     if not text:
         return ""
-    escape_chars = r'_*[]()~`>#+-=|{}.!'
-    for char in escape_chars:
-        text = text.replace(char, '\\' + char)
-    return text
-
-async def send_comment_message(context, chat_id, comment, author_text, reply_to_message_id=None):
+    return str(text).translate(_MARKDOWN_V2_TABLE)
+
+async def fetch_reaction_summary(comment_ids, user_id=None):
+    """Like/dislike counts and the viewer's own reaction for many comments in one query"""
+    rows = await db_fetch_all('''
+        SELECT comment_id,
+               COUNT(*) FILTER (WHERE type = 'like') AS likes,
+               COUNT(*) FILTER (WHERE type = 'dislike') AS dislikes,
+               MAX(type) FILTER (WHERE user_id = %s) AS user_reaction
+        FROM reactions
+        WHERE comment_id = ANY(%s)
+        GROUP BY comment_id
+    ''', (user_id, list(comment_ids))) or []
+    return {row['comment_id']: row for row in rows}
+
+# Caps concurrent Telegram sends when a page fans out (Telegram allows ~30 messages/sec per bot)
+TELEGRAM_SEND_LIMIT = asyncio.Semaphore(int(os.getenv('TELEGRAM_SEND_CONCURRENCY', 10)))
+# Bot-wide requests per second (Telegram allows ~30) and RetryAfter retries for the AIORateLimiter
+TELEGRAM_MAX_RATE = int(os.getenv('TELEGRAM_MAX_RATE', 28))
+TELEGRAM_MAX_RETRIES = 3
+
+async def send_limited(coro):
+    """Await a Telegram send while holding a slot of TELEGRAM_SEND_LIMIT"""
+    async with TELEGRAM_SEND_LIMIT:
+        return await coro
+
+async def send_comment_message(context, chat_id, comment, author_text, reply_to_message_id=None, reactions=None):
     """Helper function to send comments with proper media handling"""
     comment_id = comment['comment_id']
     comment_type = comment['type']
     file_id = comment['file_id']
     content = comment['content']
     
-    # Get user reaction for buttons
+    # Get reaction counts and the viewer's reaction (pages pass them in pre-aggregated)
     user_id = getattr(context, '_user_id', None)
-    user_reaction = None
-    if user_id:
-        user_reaction = db_fetch_one(
-            "SELECT type FROM reactions WHERE comment_id = %s AND user_id = %s",
-            (comment_id, user_id)
-        )
-    
-    # Get reaction counts
-    likes_row = db_fetch_one(
-        "SELECT COUNT(*) as cnt FROM reactions WHERE comment_id = %s AND type = 'like'",
-        (comment_id,)
-    )
-    likes = likes_row['cnt'] if likes_row else 0
-    
-    dislikes_row = db_fetch_one(
-        "SELECT COUNT(*) as cnt FROM reactions WHERE comment_id = %s AND type = 'dislike'",
-        (comment_id,)
-    )
-    dislikes = dislikes_row['cnt'] if dislikes_row else 0
+    if reactions is None:
+        reactions = await fetch_reaction_summary([comment_id], user_id)
+    summary = reactions.get(comment_id) or {}
+    likes = summary.get('likes', 0)
+    dislikes = summary.get('dislikes', 0)
+    user_reaction = summary.get('user_reaction')
 
-    like_emoji = "👍" if user_reaction and user_reaction['type'] == 'like' else "👍"
-    dislike_emoji = "👎" if user_reaction and user_reaction['type'] == 'dislike' else "👎"
+    like_emoji = "👍" if user_reaction == 'like' else "👍"
+    dislike_emoji = "👎" if user_reaction == 'dislike' else "👎"
 
     # Build keyboard
     kb_buttons = [
@@ -2918,7 +3370,7 @@ async def send_comment_message(context, chat_id, comment, author_text, reply_to_
             return msg.message_id
             
     except Exception as e:
-        logger.error(f"Error sending comment {comment_id}: {e}")
+        logger.error("Error sending comment %s: %s", comment_id, e)
         # Fallback to text without markdown on error
         try:
             message_text = f"[Media] {content}\n\n{author_text}"
@@ -2931,7 +3383,7 @@ async def send_comment_message(context, chat_id, comment, author_text, reply_to_
             )
             return msg.message_id
         except Exception as e2:
-            logger.error(f"Fallback also failed: {e2}")
+            logger.error("Fallback also failed: %s", e2)
             return None
 async def show_comments_page(update, context, post_id, page=1, reply_pages=None):
     if update.effective_chat is None:
@@ -2939,6 +3391,8 @@ async def show_comments_page(update, context, post_id, page=1, reply_pages=None)
         return
     chat_id = update.effective_chat.id
 
+    user_id = str(update.effective_user.id)
+
     # Show typing animation
     await typing_animation(context, chat_id, 0.5)
     
@@ -2953,41 +3407,68 @@ async def show_comments_page(update, context, post_id, page=1, reply_pages=None)
         except:
             pass
 
-    post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+    # Every query for this page shares one pooled connection; Telegram calls wait until it is released
+    comments = []
+    replies_by_parent = {}
+    reactions = {}
+    async with db_session():
+        post = await get_post(post_id)
+        if post:
+            per_page = 5  # Top-level comments per page
+            offset = (page - 1) * per_page
+
+            # Show oldest first, newest last (author name, sex and rating joined in, so no per-comment user lookups)
+            comments = await db_fetch_all('''
+                SELECT c.*, u.anonymous_name, u.sex, u.contribution_count AS rating, COUNT(*) OVER () AS total_count
+                FROM comments c
+                LEFT JOIN users u ON u.user_id = c.author_id
+                WHERE c.post_id = %s AND c.parent_comment_id = 0
+                ORDER BY c.timestamp ASC
+                LIMIT %s OFFSET %s
+            ''', (post_id, per_page, offset)) or []
+
+        # Load the first replies of every comment on this page (with their authors) in one round trip
+        replies_per_comment = 3
+        if comments:
+            reply_rows = await db_fetch_all('''
+                SELECT r.*, u.anonymous_name, u.sex, u.contribution_count AS rating
+                FROM (
+                    SELECT c.*,
+                           ROW_NUMBER() OVER (PARTITION BY c.parent_comment_id ORDER BY c.timestamp ASC) AS reply_rank,
+                           COUNT(*) OVER (PARTITION BY c.parent_comment_id) AS total_replies
+                    FROM comments c
+                    WHERE c.parent_comment_id = ANY(%s)
+                ) r
+                LEFT JOIN users u ON u.user_id = r.author_id
+                WHERE r.reply_rank <= %s
+                ORDER BY r.parent_comment_id, r.reply_rank
+            ''', ([c['comment_id'] for c in comments], replies_per_comment)) or []
+            for reply in reply_rows:
+                replies_by_parent.setdefault(reply['parent_comment_id'], []).append(reply)
+
+            # Reaction counts for every comment and reply on the page in one GROUP BY
+            page_comment_ids = [c['comment_id'] for c in comments]
+            page_comment_ids += [r['comment_id'] for replies in replies_by_parent.values() for r in replies]
+            reactions = await fetch_reaction_summary(page_comment_ids, user_id)
+
+    # Delete loading message if it exists
+    if loading_msg:
+        try:
+            await loading_msg.delete()
+        except:
+            pass
+
     if not post:
-        if loading_msg:
-            try:
-                await loading_msg.delete()
-            except:
-                pass
         await context.bot.send_message(chat_id, "❌ Post not found.", reply_markup=main_menu)
         return
 
     post_author_id = post['author_id']
 
-    per_page = 5  # Top-level comments per page
-    offset = (page - 1) * per_page
-
-    # Show oldest first, newest last
-    comments = db_fetch_all(
-        "SELECT * FROM comments WHERE post_id = %s AND parent_comment_id = 0 ORDER BY timestamp ASC LIMIT %s OFFSET %s",
-        (post_id, per_page, offset)
-    )
-
-    # Count only top-level comments for pagination
-    total_comments_row = db_fetch_one(
-        "SELECT COUNT(*) as cnt FROM comments WHERE post_id = %s AND parent_comment_id = 0",
-        (post_id,)
-    )
-    total_comments = total_comments_row['cnt'] if total_comments_row else 0
+    # Count only top-level comments for pagination (window total rides along with the page)
+    total_comments = comments[0]['total_count'] if comments else 0
     total_pages = (total_comments + per_page - 1) // per_page
 
     if not comments and page == 1:
-        if loading_msg:
-            try:
-                await loading_msg.delete()
-            except:
-                pass
         await context.bot.send_message(
             chat_id=chat_id,
             text="\\_No comments yet.\\_",
@@ -2996,62 +3477,33 @@ async def show_comments_page(update, context, post_id, page=1, reply_pages=None)
         )
         return
 
-    user_id = str(update.effective_user.id)
     context._user_id = user_id
     context._post_author_id = post_author_id
 
     if reply_pages is None:
         reply_pages = {}
 
-    # Delete loading message if it exists
-    if loading_msg:
-        try:
-            await loading_msg.delete()
-        except:
-            pass
-
-    # Show each top-level comment with LIMITED replies
+    # Each comment is followed by its replies and its "Show more replies" button, in order, before
+    # the next comment - the chat shows messages in arrival order
     for comment in comments:
-        commenter_id = comment['author_id']
-        commenter = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (commenter_id,))
-        display_sex = get_display_sex(commenter)
-        display_name = get_display_name(commenter)
-        rating = calculate_user_rating(commenter_id)
-        profile_link = f"https://t.me/{BOT_USERNAME}?start=profileid_{commenter_id}"
-
-        # Check if commenter is the vent author
-        if str(commenter_id) == str(post_author_id):
-            author_text = (
-                f"{display_sex} "
-                f"✅ _[vent author]({escape_markdown(profile_link, version=2)})_ "
-                f"⚡ _Aura_ {rating} {format_aura(rating)}"
-            )
-        else:
-            author_text = (
-                f"{display_sex} "
-                f"_[{escape_markdown(display_name, version=2)}]({escape_markdown(profile_link, version=2)})_ "
-                f"⚡ _Aura_ {rating} {format_aura(rating)}"
+        try:
+            msg_id = await send_top_level_comment(
+                context, chat_id, comment, post_author_id,
+                commenter=comment, reactions=reactions
             )
-
-        # Send the top-level comment
-        msg_id = await send_comment_message(context, chat_id, comment, author_text, None)
+        except Exception as e:
+            logger.error("Error sending comment %s: %s", comment['comment_id'], e)
+            continue
 
         # Show LIMITED replies for this comment (first 3 replies)
-        replies_per_comment = 3
-        replies = db_fetch_all(
-            "SELECT * FROM comments WHERE parent_comment_id = %s ORDER BY timestamp ASC LIMIT %s",
-            (comment['comment_id'], replies_per_comment)
-        )
-        
-        # Count total replies for this comment
-        total_replies_row = db_fetch_one(
-            "SELECT COUNT(*) as cnt FROM comments WHERE parent_comment_id = %s",
-            (comment['comment_id'],)
-        )
-        total_replies = total_replies_row['cnt'] if total_replies_row else 0
+        replies = replies_by_parent.get(comment['comment_id'], [])
+        total_replies = replies[0]['total_replies'] if replies else 0
         
         for reply in replies:
-            await send_reply_message(context, chat_id, reply, post_author_id, msg_id)
+            try:
+                await send_reply_message(context, chat_id, reply, post_author_id, msg_id, reply_user=reply, reactions=reactions)
+            except Exception as e:
+                logger.error("Error sending reply %s: %s", reply['comment_id'], e)
 
         # Add "Show more replies" button if there are more replies
         if total_replies > replies_per_comment:
@@ -3061,12 +3513,15 @@ async def show_comments_page(update, context, post_id, page=1, reply_pages=None)
                     callback_data=f"show_more_replies_{comment['comment_id']}_1"
                 )]
             ])
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text="",
-                reply_markup=keyboard,
-                reply_to_message_id=msg_id
-            )
+            try:
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text="",
+                    reply_markup=keyboard,
+                    reply_to_message_id=msg_id
+                )
+            except Exception as e:
+                logger.error("Error sending show-more button for comment %s: %s", comment['comment_id'], e)
     
     # Pagination buttons for top-level comments
     pagination_buttons = []
@@ -3083,32 +3538,70 @@ async def show_comments_page(update, context, post_id, page=1, reply_pages=None)
             reply_markup=pagination_markup,
             disable_web_page_preview=True
         )
-async def send_reply_message(context, chat_id, reply, post_author_id, reply_to_message_id):
-    """Send a single reply message with proper formatting"""
-    reply_user_id = reply['author_id']
-    reply_user = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (reply_user_id,))
-    reply_display_name = get_display_name(reply_user)
-    reply_display_sex = get_display_sex(reply_user)
-    rating_reply = calculate_user_rating(reply_user_id)
-    
-    reply_profile_link = f"https://t.me/{BOT_USERNAME}?start=profileid_{reply_user_id}"
-    
-    # Check if reply author is the vent author
-    if str(reply_user_id) == str(post_author_id):
-        reply_author_text = (
-            f"{reply_display_sex} "
-            f"✅ _[vent author]({reply_profile_link})_ "
-            f"⚡ _Aura_ {rating_reply} {format_aura(rating_reply)}"
-        )
-    else:
-        reply_author_text = (
-            f"{reply_display_sex} "
-            f"_[{escape_markdown(reply_display_name, version=2)}]({reply_profile_link})_ "
-            f"⚡ _Aura_ {rating_reply} {format_aura(rating_reply)}"
-        )
+async def send_top_level_comment(context, chat_id, comment, post_author_id, commenter=None, reactions=None):
+    """Send a top-level comment and return its message id (pass commenter if the author row is already loaded)"""
+    author_text = cache_get(COMMENT_RENDER_CACHE, comment['comment_id'])
+    if author_text is None:
+        commenter_id = comment['author_id']
+        if commenter is None:
+            commenter = await get_user_profile(commenter_id)
+        display_sex = get_display_sex(commenter)
+        display_name = get_display_name(commenter)
+        # Page rows carry the author's contribution_count as 'rating'; anything else looks it up
+        rating = commenter.get('rating') if commenter else None
+        if rating is None:
+            rating = await run_db(calculate_user_rating, commenter_id)
+        profile_link = f"https://t.me/{BOT_USERNAME}?start=profileid_{commenter_id}"
+
+        # Check if commenter is the vent author
+        if commenter_id == post_author_id:
+            author_text = (
+                f"{display_sex} "
+                f"✅ _[vent author]({escape_markdown_v2(profile_link)})_ "
+                f"⚡ _Aura_ {rating} {format_aura(rating)}"
+            )
+        else:
+            author_text = (
+                f"{display_sex} "
+                f"_[{escape_markdown_v2(display_name)}]({escape_markdown_v2(profile_link)})_ "
+                f"⚡ _Aura_ {rating} {format_aura(rating)}"
+            )
+        cache_set(COMMENT_RENDER_CACHE, comment['comment_id'], author_text)
+
+    return await send_comment_message(context, chat_id, comment, author_text, None, reactions=reactions)
+
+async def send_reply_message(context, chat_id, reply, post_author_id, reply_to_message_id, reply_user=None, reactions=None):
+    """Send a single reply message with proper formatting (pass reply_user if the author row is already loaded)"""
+    reply_author_text = cache_get(COMMENT_RENDER_CACHE, reply['comment_id'])
+    if reply_author_text is None:
+        reply_user_id = reply['author_id']
+        if reply_user is None:
+            reply_user = await get_user_profile(reply_user_id)
+        reply_display_name = get_display_name(reply_user)
+        reply_display_sex = get_display_sex(reply_user)
+        rating_reply = reply_user.get('rating') if reply_user else None
+        if rating_reply is None:
+            rating_reply = await run_db(calculate_user_rating, reply_user_id)
+        
+        reply_profile_link = f"https://t.me/{BOT_USERNAME}?start=profileid_{reply_user_id}"
+        
+        # Check if reply author is the vent author
+        if reply_user_id == post_author_id:
+            reply_author_text = (
+                f"{reply_display_sex} "
+                f"✅ _[vent author]({reply_profile_link})_ "
+                f"⚡ _Aura_ {rating_reply} {format_aura(rating_reply)}"
+            )
+        else:
+            reply_author_text = (
+                f"{reply_display_sex} "
+                f"_[{escape_markdown_v2(reply_display_name)}]({reply_profile_link})_ "
+                f"⚡ _Aura_ {rating_reply} {format_aura(rating_reply)}"
+            )
+        cache_set(COMMENT_RENDER_CACHE, reply['comment_id'], reply_author_text)
 
     # Send the reply
-    await send_comment_message(context, chat_id, reply, reply_author_text, reply_to_message_id)
+    await send_comment_message(context, chat_id, reply, reply_author_text, reply_to_message_id, reactions=reactions)
 
 async def show_more_replies(update: Update, context: ContextTypes.DEFAULT_TYPE, comment_id: int, page: int):
     """Show additional replies for a comment (paginated)"""
@@ -3118,31 +3611,31 @@ async def show_more_replies(update: Update, context: ContextTypes.DEFAULT_TYPE,
     chat_id = update.effective_chat.id
     
     # Get the comment to find its post
-    comment = db_fetch_one("SELECT post_id FROM comments WHERE comment_id = %s", (comment_id,))
+    comment = await db_fetch_one("SELECT post_id FROM comments WHERE comment_id = %s", (comment_id,))
     if not comment:
         await query.answer("❌ Comment not found", show_alert=True)
         return
     
     post_id = comment['post_id']
-    post = db_fetch_one("SELECT author_id FROM posts WHERE post_id = %s", (post_id,))
+    post = await db_fetch_one("SELECT author_id FROM posts WHERE post_id = %s", (post_id,))
     post_author_id = post['author_id'] if post else None
     
     # Pagination for replies
     replies_per_page = 5
     offset = (page - 1) * replies_per_page
     
-    # Get replies for this page
-    replies = db_fetch_all(
-        "SELECT * FROM comments WHERE parent_comment_id = %s ORDER BY timestamp ASC LIMIT %s OFFSET %s",
-        (comment_id, replies_per_page, offset)
-    )
+    # Get replies for this page with their authors joined in
+    replies = await db_fetch_all('''
+        SELECT c.*, u.anonymous_name, u.sex, u.contribution_count AS rating, COUNT(*) OVER () AS total_count
+        FROM comments c
+        LEFT JOIN users u ON u.user_id = c.author_id
+        WHERE c.parent_comment_id = %s
+        ORDER BY c.timestamp ASC
+        LIMIT %s OFFSET %s
+    ''', (comment_id, replies_per_page, offset))
     
     # Count total replies
-    total_replies_row = db_fetch_one(
-        "SELECT COUNT(*) as cnt FROM comments WHERE parent_comment_id = %s",
-        (comment_id,)
-    )
-    total_replies = total_replies_row['cnt'] if total_replies_row else 0
+    total_replies = replies[0]['total_count'] if replies else 0
     total_pages = (total_replies + replies_per_page - 1) // replies_per_page
     
     # Delete the "Show more replies" button
@@ -3152,8 +3645,9 @@ async def show_more_replies(update: Update, context: ContextTypes.DEFAULT_TYPE,
         pass
     
     # Send the replies for this page
+    reactions = await fetch_reaction_summary([r['comment_id'] for r in replies], getattr(context, '_user_id', None)) if replies else {}
     for reply in replies:
-        await send_reply_message(context, chat_id, reply, post_author_id, query.message.reply_to_message.message_id)
+        await send_reply_message(context, chat_id, reply, post_author_id, query.message.reply_to_message.message_id, reply_user=reply, reactions=reactions)
     
     # If there are more replies, show another "Show more" button
     if page < total_pages:
@@ -3171,25 +3665,10 @@ async def show_more_replies(update: Update, context: ContextTypes.DEFAULT_TYPE,
             reply_to_message_id=query.message.reply_to_message.message_id
         )
 async def menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    keyboard = [
-        [
-            InlineKeyboardButton("🌟 Share My Thoughts", callback_data='ask'),
-            InlineKeyboardButton("👤 View Profile", callback_data='profile')
-        ],
-        [
-            InlineKeyboardButton("📚 My Content", callback_data='my_content_menu'),
-            InlineKeyboardButton("🏆 Leaderboard", callback_data='leaderboard')
-        ],
-        [
-            InlineKeyboardButton("⚙️ Settings", callback_data='settings'),
-            InlineKeyboardButton("❓ Help", callback_data='help')
-        ]
-    ]
-    
     if hasattr(update, 'message') and update.message:
         await update.message.reply_text(
             "📱 *Main Menu*\nChoose an option below:",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=MAIN_MENU_MARKUP,
             parse_mode=ParseMode.MARKDOWN
         )
         
@@ -3200,7 +3679,7 @@ async def menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif hasattr(update, 'callback_query') and update.callback_query:
         await update.callback_query.message.reply_text(
             "📱 *Main Menu*\nChoose an option below:",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=MAIN_MENU_MARKUP,
             parse_mode=ParseMode.MARKDOWN
         )
         
@@ -3210,29 +3689,22 @@ async def menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 async def send_updated_profile(user_id: str, chat_id: int, context: ContextTypes.DEFAULT_TYPE):
-    user = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (user_id,))
+    user = await db_fetch_one("SELECT * FROM users WHERE user_id = %s", (user_id,))
     if not user:
         return
     
     display_name = get_display_name(user)
     display_sex = get_display_sex(user)
-    rating = calculate_user_rating(user_id)
+    rating = await run_db(calculate_user_rating, user_id)
     
     
-    followers = db_fetch_all(
-        "SELECT * FROM followers WHERE followed_id = %s",
+    followers_row = await db_fetch_one(
+        "SELECT COUNT(*) AS cnt FROM followers WHERE followed_id = %s",
         (user_id,)
     )
+    followers_count = followers_row['cnt'] if followers_row else 0
     
-    # UPDATED: Changed to "My Content" menu
-    kb = InlineKeyboardMarkup([
-        [InlineKeyboardButton("✏️ Set My Name", callback_data='edit_name')],
-        [InlineKeyboardButton("⚧️ Set My Sex", callback_data='edit_sex')],
-        [InlineKeyboardButton("📚 My Content", callback_data='my_content_menu')],  # Changed to menu
-        [InlineKeyboardButton("📭 Inbox", callback_data='inbox')],
-        [InlineKeyboardButton("⚙️ Settings", callback_data='settings')],
-        [InlineKeyboardButton("📱 Main Menu", callback_data='menu')]
-    ])
+    kb = PROFILE_MENU_MARKUP
     await context.bot.send_message(
     chat_id=chat_id,
     text=(
@@ -3240,7 +3712,7 @@ async def send_updated_profile(user_id: str, chat_id: int, context: ContextTypes
         f"📌 Sex: {display_sex}\n"
         f"🌀 *Aura:* {format_aura(rating)} (Level {rating // 10 + 1})\n"
         f"🎯 Contributions: {rating} points\n"
-        f"👥 Followers: {len(followers)}\n"
+        f"👥 Followers: {followers_count}\n"
         f"〰️〰️〰️〰️〰️〰️〰️〰️〰️〰️\n"
         f"_Use /menu to return_"
     ),
@@ -3272,17 +3744,14 @@ async def show_previous_posts(update: Update, context: ContextTypes.DEFAULT_TYPE
     per_page = 8  # Show 8 posts per page
     offset = (page - 1) * per_page
     
-    # Get user's posts with pagination (newest first)
-    posts = db_fetch_all(
-        "SELECT * FROM posts WHERE author_id = %s AND approved = TRUE ORDER BY timestamp DESC LIMIT %s OFFSET %s",
+    # Get user's posts with pagination (newest first); the window count carries the total
+    posts = await db_fetch_all(
+        "SELECT post_id, content, comment_count, COUNT(*) OVER () AS total_count FROM posts "
+        "WHERE author_id = %s AND approved = TRUE ORDER BY timestamp DESC LIMIT %s OFFSET %s",
         (user_id, per_page, offset)
     )
     
-    total_posts_row = db_fetch_one(
-        "SELECT COUNT(*) as count FROM posts WHERE author_id = %s AND approved = TRUE",
-        (user_id,)
-    )
-    total_posts = total_posts_row['count'] if total_posts_row else 0
+    total_posts = posts[0]['total_count'] if posts else 0
     total_pages = (total_posts + per_page - 1) // per_page
     
     if not posts:
@@ -3292,13 +3761,7 @@ async def show_previous_posts(update: Update, context: ContextTypes.DEFAULT_TYPE
             await asyncio.sleep(0.5)
         
         text = "📝 *My Posts*\n\nYou haven't posted anything yet or your posts are pending approval."
-        keyboard = [
-            [InlineKeyboardButton("🌟 Share My Thoughts", callback_data='ask')],
-            [InlineKeyboardButton("📚 Back to My Content", callback_data='my_content_menu')],
-            [InlineKeyboardButton("📱 Main Menu", callback_data='menu')]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = NO_POSTS_MARKUP
         
         try:
             if loading_msg:
@@ -3321,7 +3784,7 @@ async def show_previous_posts(update: Update, context: ContextTypes.DEFAULT_TYPE
                         parse_mode=ParseMode.MARKDOWN
                     )
         except Exception as e:
-            logger.error(f"Error showing previous posts: {e}")
+            logger.error("Error showing previous posts: %s", e)
             if hasattr(update, 'message') and update.message:
                 await update.message.reply_text("❌ Error loading your posts. Please try again.")
         return
@@ -3344,8 +3807,8 @@ async def show_previous_posts(update: Update, context: ContextTypes.DEFAULT_TYPE
         # Clean snippet for button text
         clean_snippet = snippet.replace('*', '').replace('_', '').replace('`', '').strip()
         
-        # Get comment count for this post
-        comment_count = count_all_comments(post['post_id'])
+        # Comment count is kept on the row by the comments trigger
+        comment_count = post['comment_count'] or 0
         
         # Create button for each post with post number and snippet
         button_text = f"#{post_number} - {clean_snippet} ({comment_count}💬)"
@@ -3380,10 +3843,7 @@ async def show_previous_posts(update: Update, context: ContextTypes.DEFAULT_TYPE
         keyboard.append(pagination_row)
     
     # Add navigation buttons
-    keyboard.append([
-        InlineKeyboardButton("📚 Back to My Content", callback_data='my_content_menu'),
-        InlineKeyboardButton("📱 Main Menu", callback_data='menu')
-    ])
+    keyboard.append(CONTENT_NAV_ROW)
     
     # Create the reply markup
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -3412,7 +3872,7 @@ async def show_previous_posts(update: Update, context: ContextTypes.DEFAULT_TYPE
                         parse_mode=ParseMode.MARKDOWN
                     )
     except Exception as e:
-        logger.error(f"Error showing previous posts: {e}")
+        logger.error("Error showing previous posts: %s", e)
         if loading_msg:
             try:
                 await loading_msg.edit_text("❌ Error loading your posts. Please try again.")
@@ -3433,36 +3893,32 @@ async def show_my_content_menu(update: Update, context: ContextTypes.DEFAULT_TYP
     except:
         pass
     
-    keyboard = [
-        [InlineKeyboardButton("📝 My Posts", callback_data='my_posts_1')],
-        [InlineKeyboardButton("💬 My Comments", callback_data='my_comments_1')],
-        [InlineKeyboardButton("📱 Main Menu", callback_data='menu')]
-    ]
-    
     text = "📚 *My Content*\n\nChoose what you want to view:"
     
+    reply_markup = MY_CONTENT_MARKUP
+
     try:
         if loading_msg:
             await loading_msg.edit_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=reply_markup,
                 parse_mode=ParseMode.MARKDOWN
             )
         elif hasattr(update, 'callback_query') and update.callback_query:
             await update.callback_query.message.edit_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=reply_markup,
                 parse_mode=ParseMode.MARKDOWN
             )
         else:
             if hasattr(update, 'message') and update.message:
                 await update.message.reply_text(
                     text,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.MARKDOWN
                 )
     except Exception as e:
-        logger.error(f"Error showing my content menu: {e}")
+        logger.error("Error showing my content menu: %s", e)
         if hasattr(update, 'message') and update.message:
             await update.message.reply_text("❌ Error loading content menu. Please try again.")
 
@@ -3482,7 +3938,7 @@ async def view_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_id:
     await animated_loading(loading_msg, "Loading", 2)
     
     # Get post details
-    post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+    post = await get_post(post_id)
     
     if not post:
         await replace_with_error(loading_msg, "Post not found")
@@ -3496,8 +3952,8 @@ async def view_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_id:
         return
     
     # Format the post content
-    escaped_content = escape_markdown(post['content'], version=2)
-    escaped_category = escape_markdown(post['category'], version=2)
+    escaped_content = escape_markdown_v2(post['content'])
+    escaped_category = escape_markdown_v2(post['category'])
     
     # Format timestamp
     if isinstance(post['timestamp'], str):
@@ -3505,8 +3961,8 @@ async def view_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_id:
     else:
         timestamp = post['timestamp'].strftime('%b %d, %Y at %H:%M')
     
-    # Get comment count
-    comment_count = count_all_comments(post_id)
+    # Comment count is kept on the post row by the comments trigger
+    comment_count = post['comment_count'] or 0
     
     # Build the post detail text
     text = (
@@ -3514,7 +3970,7 @@ async def view_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_id:
         f"━━━━━━━━━━━━━━━━━━━━━\n\n"
         f"🆔 **Post ID:** \\#{post['post_id']}\n"
         f"📌 **Category:** {escaped_category}\n"
-        f"📅 **Posted on:** {escape_markdown(timestamp, version=2)}\n"
+        f"📅 **Posted on:** {escape_markdown_v2(timestamp)}\n"
         f"💬 **Comments:** {comment_count}\n\n"
         f"━━━━━━━━━━━━━━━━━━━━━\n\n"
         f"**Content:**\n\n"
@@ -3532,10 +3988,7 @@ async def view_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_id:
             InlineKeyboardButton("🗑 Delete Post", callback_data=f"delete_post_{post_id}_{from_page}"),
             InlineKeyboardButton("🔙 Back to List", callback_data=f"my_posts_{from_page}")
         ],
-        [
-            InlineKeyboardButton("📚 Back to My Content", callback_data='my_content_menu'),
-            InlineKeyboardButton("📱 Main Menu", callback_data='menu')
-        ]
+        CONTENT_NAV_ROW
     ]
     
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -3549,7 +4002,7 @@ async def view_post(update: Update, context: ContextTypes.DEFAULT_TYPE, post_id:
             parse_mode=ParseMode.MARKDOWN_V2
         )
     except Exception as e:
-        logger.error(f"Error viewing post: {e}")
+        logger.error("Error viewing post: %s", e)
         await replace_with_error(loading_msg, "Error loading post")
 # NEW: Function to show user's comments
 async def show_my_comments(update: Update, context: ContextTypes.DEFAULT_TYPE, page=1):
@@ -3574,9 +4027,10 @@ async def show_my_comments(update: Update, context: ContextTypes.DEFAULT_TYPE, p
     per_page = 10
     offset = (page - 1) * per_page
     
-    # Get user's comments with post info
-    comments = db_fetch_all('''
-        SELECT c.*, p.content as post_content, p.post_id, p.category
+    # Get user's comments with post info; the window count carries the total
+    comments = await db_fetch_all('''
+        SELECT c.*, p.content as post_content, p.post_id, p.category,
+               COUNT(*) OVER () AS total_count
         FROM comments c
         JOIN posts p ON c.post_id = p.post_id
         WHERE c.author_id = %s
@@ -3584,11 +4038,7 @@ async def show_my_comments(update: Update, context: ContextTypes.DEFAULT_TYPE, p
         LIMIT %s OFFSET %s
     ''', (user_id, per_page, offset))
     
-    total_comments_row = db_fetch_one(
-        "SELECT COUNT(*) as count FROM comments WHERE author_id = %s",
-        (user_id,)
-    )
-    total_comments = total_comments_row['count'] if total_comments_row else 0
+    total_comments = comments[0]['total_count'] if comments else 0
     total_pages = (total_comments + per_page - 1) // per_page
     
     if not comments:
@@ -3598,23 +4048,19 @@ async def show_my_comments(update: Update, context: ContextTypes.DEFAULT_TYPE, p
             await asyncio.sleep(0.5)
         
         text = "💬 \\*My Comments\\*\n\nYou haven't made any comments yet\\."
-        keyboard = [
-            [InlineKeyboardButton("📚 Back to My Content", callback_data='my_content_menu')],
-            [InlineKeyboardButton("📱 Main Menu", callback_data='menu')]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = NO_COMMENTS_MARKUP
     else:
-        text = f"💬 \\*My Comments\\* \\(Page {page}/{total_pages}\\)\n\n"
+        text_parts = [f"💬 \\*My Comments\\* \\(Page {page}/{total_pages}\\)\n\n"]
         
         for idx, comment in enumerate(comments):
             comment_num = (page - 1) * per_page + idx + 1
             
             # Truncate content
             comment_preview = comment['content'][:80] + '...' if len(comment['content']) > 80 else comment['content']
-            escaped_comment_preview = escape_markdown(comment_preview, version=2)
+            escaped_comment_preview = escape_markdown_v2(comment_preview)
             
-            text += f"\\*\\*{comment_num}\\.\\*\\* {escaped_comment_preview}\n\n"
+            text_parts.append(f"\\*\\*{comment_num}\\.\\*\\* {escaped_comment_preview}\n\n")
+        text = "".join(text_parts)
         
         # Build keyboard
         keyboard = []
@@ -3642,7 +4088,7 @@ async def show_my_comments(update: Update, context: ContextTypes.DEFAULT_TYPE, p
             InlineKeyboardButton("📝 My Posts", callback_data='my_posts_1'),
             InlineKeyboardButton("📚 Back to My Content", callback_data='my_content_menu')
         ])
-        keyboard.append([InlineKeyboardButton("📱 Main Menu", callback_data='menu')])
+        keyboard.append(MAIN_MENU_ROW)
         
         reply_markup = InlineKeyboardMarkup(keyboard)
     
@@ -3670,38 +4116,86 @@ async def show_my_comments(update: Update, context: ContextTypes.DEFAULT_TYPE, p
                         parse_mode=ParseMode.MARKDOWN_V2
                     )
     except Exception as e:
-        logger.error(f"Error showing my comments: {e}")
+        logger.error("Error showing my comments: %s", e)
         if hasattr(update, 'message') and update.message:
             await update.message.reply_text("❌ Error loading your comments. Please try again.")
 
+# Callbacks that just delegate to a screen; looked up by exact callback data
+SIMPLE_CALLBACKS = {
+    'settings': lambda update, context: show_settings(update, context),
+    'my_content_menu': lambda update, context: show_my_content_menu(update, context),
+    'my_posts': lambda update, context: show_previous_posts(update, context, 1),
+    'my_comments': lambda update, context: show_my_comments(update, context, 1),
+    'admin_panel': lambda update, context: admin_panel(update, context),
+    'admin_pending': lambda update, context: show_pending_posts(update, context),
+    'admin_stats': lambda update, context: show_admin_stats(update, context),
+    'admin_broadcast': lambda update, context: start_broadcast(update, context),
+    'execute_broadcast': lambda update, context: execute_broadcast(update, context),
+    'inbox': lambda update, context: show_inbox(update, context, 1),
+    'mark_all_read': lambda update, context: mark_all_read(update, context),
+}
+
+# Parameterized callbacks, matched once per click. Longest prefixes come first so
+# e.g. 'reply_msg_' wins over 'reply_' and 'confirm_delete_post_' is never shadowed.
+CALLBACK_PREFIXES = (
+    'category_', 'sex_', 'follow_', 'unfollow_', 'viewcomments_', 'writecomment_',
+    'likecomment_', 'dislikecomment_', 'likereply_', 'dislikereply_',
+    'edit_comment_', 'delete_comment_', 'delete_post_', 'confirm_delete_post_', 'cancel_delete_post_',
+    'reply_msg_', 'reply_', 'replytoreply_', 'show_more_replies_', 'previous_posts_',
+    'my_posts_', 'viewpost_', 'my_comments_', 'view_comment_', 'continue_post_', 'replypage_',
+    'approve_post_', 'broadcast_', 'reject_post_', 'inbox_page_', 'view_message_',
+    'delete_message_', 'confirm_delete_message_', 'cancel_delete_message_', 'message_', 'block_user_',
+)
+CALLBACK_PREFIX_RE = re.compile(
+    '^(' + '|'.join(re.escape(p) for p in sorted(CALLBACK_PREFIXES, key=len, reverse=True)) + ')'
+)
+
+def _parse_int(value, default=None):
+    """Callback id/page as int, or default when it isn't a plain non-negative integer"""
+    return int(value) if value.isascii() and value.isdigit() else default
+
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     try:
         await query.answer()
     except Exception as e:
-        logger.error(f"Error answering callback query: {e}")
+        logger.error("Error answering callback query: %s", e)
     
     user_id = str(query.from_user.id)
     
     # Log the callback data for debugging
-    logger.info(f"Callback data received: {query.data} from user {user_id}")
+    logger.debug("Callback data received: %s from user %s", query.data, user_id)
     
     try:
         # ... rest of your code
         # FIXED: Handle noop callback (do nothing for separator buttons)
         if query.data == 'noop':
             return  # Do nothing and exit the function
+
+        simple_handler = SIMPLE_CALLBACKS.get(query.data)
+        if simple_handler:
+            await simple_handler(update, context)
+            return
+
+        prefix_match = CALLBACK_PREFIX_RE.match(query.data)
+        route = prefix_match.group(1) if prefix_match else query.data
+        # Everything after the prefix; single ids are used as-is and two-field
+        # payloads are split with partition() instead of building a list
+        arg = query.data[len(route):] if prefix_match else ''
             
         if query.data == 'ask':
             await query.message.reply_text(
                 "📚 *Choose a category:*",
-                reply_markup=build_category_buttons(),
+                reply_markup=CATEGORY_MARKUP,
                 parse_mode=ParseMode.MARKDOWN
             )
 
-        elif query.data.startswith('category_'):
-            category = query.data.split('_', 1)[1]
-            db_execute(
+        elif route == 'category_':
+            category = arg
+            if category not in CATEGORIES_BY_CODE:
+                await query.message.reply_text("❌ Unknown category. Please choose again.", reply_markup=CATEGORY_MARKUP)
+                return
+            await db_execute(
                 "UPDATE users SET waiting_for_post = TRUE, selected_category = %s WHERE user_id = %s",
                 (category, user_id)
             )
@@ -3713,30 +4207,16 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         
         elif query.data == 'menu':
-            keyboard = [
-                [
-                    InlineKeyboardButton("🌟 Share My Thoughts", callback_data='ask'),
-                    InlineKeyboardButton("👤 View Profile", callback_data='profile')
-                ],
-                [
-                    InlineKeyboardButton("📚 My Content", callback_data='my_content_menu'),
-                    InlineKeyboardButton("🏆 Leaderboard", callback_data='leaderboard')
-                ],
-                [
-                    InlineKeyboardButton("⚙️ Settings", callback_data='settings'),
-                    InlineKeyboardButton("❓ Help", callback_data='help')
-                ]
-            ]
             try:
                 await query.message.edit_text(
                     "📱 *Main Menu*\nChoose an option below:",
-                    reply_markup=InlineKeyboardMarkup(keyboard),
+                    reply_markup=MAIN_MENU_MARKUP,
                     parse_mode=ParseMode.MARKDOWN
                 )
             except BadRequest:
                 await query.message.reply_text(
                     "📱 *Main Menu*\nChoose an option below:",
-                    reply_markup=InlineKeyboardMarkup(keyboard),
+                    reply_markup=MAIN_MENU_MARKUP,
                     parse_mode=ParseMode.MARKDOWN
                 )
 
@@ -3776,27 +4256,27 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await typing_animation(context, query.message.chat_id, 0.3)
             await show_leaderboard(update, context)
 
-        elif query.data == 'settings':
-            await show_settings(update, context)
-
         elif query.data == 'toggle_notifications':
-            current = db_fetch_one("SELECT notifications_enabled FROM users WHERE user_id = %s", (user_id,))
-            if current:
-                new_value = not current['notifications_enabled']
-                db_execute(
-                    "UPDATE users SET notifications_enabled = %s WHERE user_id = %s",
-                    (new_value, user_id)
-                )
+            settings = await db_fetch_one(
+                "UPDATE users SET notifications_enabled = NOT notifications_enabled WHERE user_id = %s "
+                "RETURNING notifications_enabled, privacy_public, is_admin",
+                (user_id,)
+            )
+            cache_invalidate(USER_PROFILE_CACHE, user_id)
+            context.user_data.pop('settings', None)
+            if settings:
+                context.user_data['settings'] = settings
             await show_settings(update, context)
         
         elif query.data == 'toggle_privacy':
-            current = db_fetch_one("SELECT privacy_public FROM users WHERE user_id = %s", (user_id,))
-            if current:
-                new_value = not current['privacy_public']
-                db_execute(
-                    "UPDATE users SET privacy_public = %s WHERE user_id = %s",
-                    (new_value, user_id)
-                )
+            settings = await db_fetch_one(
+                "UPDATE users SET privacy_public = NOT privacy_public WHERE user_id = %s "
+                "RETURNING notifications_enabled, privacy_public, is_admin",
+                (user_id,)
+            )
+            context.user_data.pop('settings', None)
+            if settings:
+                context.user_data['settings'] = settings
             await show_settings(update, context)
 
         elif query.data == 'help':
@@ -3809,8 +4289,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "• View your profile የሚለውን በመንካት ስም፣ ጾታዎን መቀየር እንዲሁም እርስዎን የሚከተሉ ሰዎች ብዛት ማየት ይችላሉ.\n"
                 "• በተነሱ ጥያቄዎች ላይ ከቻናሉ comments የሚለድን በመጫን አስተያየትዎን መጻፍ ይችላሉ."
             )
-            keyboard = [[InlineKeyboardButton("📱 Main Menu", callback_data='menu')]]
-            await query.message.reply_text(help_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode=ParseMode.MARKDOWN)
+            await query.message.reply_text(help_text, reply_markup=BACK_TO_MENU_MARKUP, parse_mode=ParseMode.MARKDOWN)
 
         elif query.data == 'about':
             about_text = (
@@ -3818,11 +4297,10 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "🔗 Telegram: @YIDIDIYATAMIRUU\n"
                 "🙏 This bot helps you share your thoughts anonymously with the Christian community."
             )
-            keyboard = [[InlineKeyboardButton("📱 Main Menu", callback_data='menu')]]
-            await query.message.reply_text(about_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode=ParseMode.MARKDOWN)
+            await query.message.reply_text(about_text, reply_markup=BACK_TO_MENU_MARKUP, parse_mode=ParseMode.MARKDOWN)
 
         elif query.data == 'edit_name':
-            db_execute(
+            await db_execute(
                 "UPDATE users SET awaiting_name = TRUE WHERE user_id = %s",
                 (user_id,)
             )
@@ -3833,13 +4311,9 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
 
         elif query.data == 'edit_sex':
-            btns = [
-                [InlineKeyboardButton("👨 Male", callback_data='sex_male')],
-                [InlineKeyboardButton("👩 Female", callback_data='sex_female')]
-            ]
-            await query.message.reply_text("⚧️ Select your sex:", reply_markup=InlineKeyboardMarkup(btns))
+            await query.message.reply_text("⚧️ Select your sex:", reply_markup=SEX_PICKER_MARKUP)
 
-        elif query.data.startswith('sex_'):
+        elif route == 'sex_':
             if query.data == 'sex_male':
                 sex = '👨'
             elif query.data == 'sex_female':
@@ -3847,52 +4321,52 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             else:
                 sex = '👤'  # fallback
             
-            db_execute(
+            await db_execute(
                 "UPDATE users SET sex = %s WHERE user_id = %s",
                 (sex, user_id)
             )
+            cache_invalidate(USER_PROFILE_CACHE, user_id)
+            cache_clear(COMMENT_RENDER_CACHE)
             await query.message.reply_text("✅ Sex updated!")
             await send_updated_profile(user_id, query.message.chat.id, context)
 
-        elif query.data.startswith(('follow_', 'unfollow_')):
-            target_uid = query.data.split('_', 1)[1]
-            if query.data.startswith('follow_'):
+        elif route in ('follow_', 'unfollow_'):
+            target_uid = arg
+            if route == 'follow_':
                 try:
-                    db_execute(
+                    await db_execute(
                         "INSERT INTO followers (follower_id, followed_id) VALUES (%s, %s)",
                         (user_id, target_uid)
                     )
                 except psycopg2.IntegrityError:
                     pass
             else:
-                db_execute(
+                await db_execute(
                     "DELETE FROM followers WHERE follower_id = %s AND followed_id = %s",
                     (user_id, target_uid)
                 )
             await query.message.reply_text("✅ Successfully updated!")
             await send_updated_profile(target_uid, query.message.chat.id, context)
         
-        elif query.data.startswith('viewcomments_'):
+        elif route == 'viewcomments_':
             try:
-                parts = query.data.split('_')
-                if len(parts) >= 3 and parts[1].isdigit() and parts[2].isdigit():
-                    post_id = int(parts[1])
-                    page = int(parts[2])
+                post_part, _, page_part = arg.partition('_')
+                post_id, page = _parse_int(post_part), _parse_int(page_part)
+                if post_id is not None and page is not None:
                     await show_comments_page(update, context, post_id, page)
             except Exception as e:
-                logger.error(f"ViewComments error: {e}")
+                logger.error("ViewComments error: %s", e)
                 await query.answer("❌ Error loading comments")
   
-        elif query.data.startswith('writecomment_'):
-            post_id_str = query.data.split('_', 1)[1]
-            if post_id_str.isdigit():
-                post_id = int(post_id_str)
-                db_execute(
+        elif route == 'writecomment_':
+            post_id = _parse_int(arg)
+            if post_id is not None:
+                await db_execute(
                     "UPDATE users SET waiting_for_comment = TRUE, comment_post_id = %s WHERE user_id = %s",
                     (post_id, user_id)
                 )
                 
-                post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+                post = await get_post(post_id)
                 preview_text = "Original content not found"
                 if post:
                     content = post['content'][:100] + '...' if len(post['content']) > 100 else post['content']
@@ -3906,53 +4380,33 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
                 return
         # FIXED: Like/Dislike reaction handling
-        elif query.data.startswith(("likecomment_", "dislikecomment_", "likereply_", "dislikereply_")):
+        elif route in ('likecomment_', 'dislikecomment_', 'likereply_', 'dislikereply_'):
             try:
-                parts = query.data.split('_')
-                comment_id = int(parts[1])
-                reaction_type = 'like' if parts[0] in ('likecomment', 'likereply') else 'dislike'
-
-                # Check if user already has a reaction on this comment
-                existing_reaction = db_fetch_one(
-                    "SELECT type FROM reactions WHERE comment_id = %s AND user_id = %s",
-                    (comment_id, user_id)
-                )
-
-                if existing_reaction:
-                    if existing_reaction['type'] == reaction_type:
-                        # User is clicking the same reaction - remove it (toggle off)
-                        db_execute(
-                            "DELETE FROM reactions WHERE comment_id = %s AND user_id = %s",
-                            (comment_id, user_id)
-                        )
-                    else:
-                        # User is changing reaction - update it
-                        db_execute(
-                            "UPDATE reactions SET type = %s WHERE comment_id = %s AND user_id = %s",
-                            (reaction_type, comment_id, user_id)
-                        )
-                else:
-                    # User is adding a new reaction
-                    db_execute(
-                        "INSERT INTO reactions (comment_id, user_id, type) VALUES (%s, %s, %s)",
-                        (comment_id, user_id, reaction_type)
+                comment_id = int(arg)
+                reaction_type = 'like' if route in ('likecomment_', 'likereply_') else 'dislike'
+
+                # Toggle in one statement: clicking the same reaction removes it,
+                # otherwise upsert on UNIQUE(comment_id, user_id)
+                await db_execute(
+                    """WITH removed AS (
+                        DELETE FROM reactions
+                        WHERE comment_id = %s AND user_id = %s AND type = %s
+                        RETURNING 1
                     )
-
-                # Get updated counts
-                likes_row = db_fetch_one(
-                    "SELECT COUNT(*) as cnt FROM reactions WHERE comment_id = %s AND type = 'like'",
-                    (comment_id,)
+                    INSERT INTO reactions (comment_id, user_id, type)
+                    SELECT %s, %s, %s WHERE NOT EXISTS (SELECT 1 FROM removed)
+                    ON CONFLICT (comment_id, user_id) DO UPDATE SET type = EXCLUDED.type""",
+                    (comment_id, user_id, reaction_type, comment_id, user_id, reaction_type)
                 )
-                likes = likes_row['cnt'] if likes_row else 0
-                
-                dislikes_row = db_fetch_one(
-                    "SELECT COUNT(*) as cnt FROM reactions WHERE comment_id = %s AND type = 'dislike'",
-                    (comment_id,)
-                )
-                dislikes = dislikes_row['cnt'] if dislikes_row else 0
 
-                comment = db_fetch_one(
-                    "SELECT post_id, parent_comment_id, author_id, type FROM comments WHERE comment_id = %s",
+                # Get updated counts and the user's current reaction in one query
+                summary = (await fetch_reaction_summary([comment_id], user_id)).get(comment_id) or {}
+                likes = summary.get('likes', 0)
+                dislikes = summary.get('dislikes', 0)
+                user_reaction = summary.get('user_reaction')
+
+                comment = await db_fetch_one(
+                    "SELECT post_id, parent_comment_id, author_id, type, content FROM comments WHERE comment_id = %s",
                     (comment_id,)
                 )
                 if not comment:
@@ -3962,14 +4416,8 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 post_id = comment['post_id']
                 parent_comment_id = comment['parent_comment_id']
 
-                # Get user's current reaction after update
-                user_reaction = db_fetch_one(
-                    "SELECT type FROM reactions WHERE comment_id = %s AND user_id = %s",
-                    (comment_id, user_id)
-                )
-
-                like_emoji = "👍" if user_reaction and user_reaction['type'] == 'like' else "👍"
-                dislike_emoji = "👎" if user_reaction and user_reaction['type'] == 'dislike' else "👎"
+                like_emoji = "👍" if user_reaction == 'like' else "👍"
+                dislike_emoji = "👎" if user_reaction == 'dislike' else "👎"
 
                 if parent_comment_id == 0:
                     # Build keyboard with edit/delete buttons for author
@@ -4026,25 +4474,20 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     )
                 except BadRequest as e:
                     if "Message is not modified" not in str(e):
-                        logger.error(f"Error updating reaction buttons: {e}")
+                        logger.error("Error updating reaction buttons: %s", e)
                 
-                # Send notification only if reaction was added (not removed)
-                if not existing_reaction or existing_reaction['type'] != reaction_type:
-                    comment_author = db_fetch_one(
-                        "SELECT user_id, notifications_enabled FROM users WHERE user_id = %s",
-                        (comment['author_id'],)
-                    )
+                # Send notification only if reaction was added (not removed): the toggle left it in place
+                if user_reaction == reaction_type:
+                    comment_author = await get_user_profile(comment['author_id'])
                     if comment_author and comment_author['notifications_enabled'] and comment_author['user_id'] != user_id:
-                        reactor_name = get_display_name(
-                            db_fetch_one("SELECT * FROM users WHERE user_id = %s", (user_id,))
-                        )
-                        post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+                        reactor_name = get_display_name(await get_user_profile(user_id))
+                        post = await get_post(post_id)
                         post_preview = post['content'][:50] + '...' if len(post['content']) > 50 else post['content']
                         
                         notification_text = (
-                            f"❤️ {reactor_name} reacted to your comment:\n\n"
-                            f"🗨 {escape_markdown(comment['content'][:100], version=2)}\n\n"
-                            f"📝 Post: {escape_markdown(post_preview, version=2)}\n\n"
+                            f"❤️ {escape_markdown_v2(reactor_name)} reacted to your comment:\n\n"
+                            f"🗨 {escape_markdown_v2(comment['content'][:100])}\n\n"
+                            f"📝 Post: {escape_markdown_v2(post_preview)}\n\n"
                             f"[View conversation](https://t.me/{BOT_USERNAME}?start=comments_{post_id})"
                         )
                         
@@ -4054,13 +4497,13 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                             parse_mode=ParseMode.MARKDOWN_V2
                         )
             except Exception as e:
-                logger.error(f"Error processing reaction: {e}")
+                logger.error("Error processing reaction: %s", e)
                 await query.answer("❌ Error updating reaction", show_alert=True)
 
         # NEW: Handle edit comment
-        elif query.data.startswith("edit_comment_"):
-            comment_id = int(query.data.split('_')[2])
-            comment = db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
+        elif route == 'edit_comment_':
+            comment_id = int(arg)
+            comment = await db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
             
             if comment and comment['author_id'] == user_id:
                 if comment['type'] != 'text':
@@ -4069,7 +4512,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     
                 context.user_data['editing_comment'] = comment_id
                 await query.message.reply_text(
-                    f"✏️ *Editing your comment:*\n\n{escape_markdown(comment['content'], version=2)}\n\nPlease type your new comment:",
+                    f"✏️ *Editing your comment:*\n\n{escape_markdown_v2(comment['content'])}\n\nPlease type your new comment:",
                     reply_markup=InlineKeyboardMarkup([
                         [InlineKeyboardButton("❌ Cancel", callback_data='cancel_input')]
                     ]),
@@ -4079,17 +4522,22 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await query.answer("❌ You can only edit your own comments", show_alert=True)
 
         # NEW: Handle delete comment
-        elif query.data.startswith("delete_comment_"):
-            comment_id = int(query.data.split('_')[2])
-            comment = db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
+        elif route == 'delete_comment_':
+            comment_id = int(arg)
+            comment = await db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
             
             if comment and comment['author_id'] == user_id:
                 # Get post_id before deleting for updating comment count
                 post_id = comment['post_id']
                 
-                # Delete the comment and its reactions
-                db_execute("DELETE FROM reactions WHERE comment_id = %s", (comment_id,))
-                db_execute("DELETE FROM comments WHERE comment_id = %s", (comment_id,))
+                # Delete the comment and its reactions in one round-trip
+                await db_execute(
+                    "DELETE FROM reactions WHERE comment_id = %(comment_id)s; DELETE FROM comments WHERE comment_id = %(comment_id)s",
+                    {'comment_id': comment_id}
+                )
+                cache_invalidate(POST_CACHE, post_id)
+                cache_invalidate(RATING_CACHE, user_id)
+                cache_invalidate(COMMENT_RENDER_CACHE, comment_id)
                 
                 await query.answer("✅ Comment deleted")
                 await query.message.delete()
@@ -4100,17 +4548,15 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await query.answer("❌ You can only delete your own comments", show_alert=True)
 
         # NEW: Handle delete post
-        elif query.data.startswith("delete_post_"):
+        elif route == 'delete_post_':
             try:
-                parts = query.data.split('_')
-                post_id = int(parts[2])
+                post_part, _, page_part = arg.partition('_')
+                post_id = int(post_part)
                 
                 # Get the page number (default to 1 if not provided)
-                from_page = 1
-                if len(parts) > 3:
-                    from_page = int(parts[3])
+                from_page = int(page_part) if page_part else 1
                 
-                post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+                post = await get_post(post_id)
                 
                 if post and post['author_id'] == user_id:
                     # Ask for confirmation with page info
@@ -4129,16 +4575,16 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 else:
                     await query.answer("❌ You can only delete your own posts", show_alert=True)
             except Exception as e:
-                logger.error(f"Error in delete_post handler: {e}")
+                logger.error("Error in delete_post handler: %s", e)
                 await query.answer("❌ Error processing request", show_alert=True)
 
-        elif query.data.startswith("confirm_delete_post_"):
+        elif route == 'confirm_delete_post_':
             try:
-                parts = query.data.split('_')
-                post_id = int(parts[3])
-                from_page = int(parts[4]) if len(parts) > 4 else 1
+                post_part, _, page_part = arg.partition('_')
+                post_id = int(post_part)
+                from_page = int(page_part) if page_part else 1
                 
-                post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+                post = await get_post(post_id)
                 
                 if post and post['author_id'] == user_id:
                     # Delete the post (same logic as before)
@@ -4149,15 +4595,12 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                                 message_id=post['channel_message_id']
                             )
                         except Exception as e:
-                            logger.error(f"Error deleting channel message: {e}")
+                            logger.error("Error deleting channel message: %s", e)
                     
                     # Delete all comments and reactions for this post
-                    comments = db_fetch_all("SELECT comment_id FROM comments WHERE post_id = %s", (post_id,))
-                    for comment in comments:
-                        db_execute("DELETE FROM reactions WHERE comment_id = %s", (comment['comment_id'],))
-                    
-                    db_execute("DELETE FROM comments WHERE post_id = %s", (post_id,))
-                    db_execute("DELETE FROM posts WHERE post_id = %s", (post_id,))
+                    await delete_post_cascade(post_id)
+                    cache_invalidate(POST_CACHE, post_id)
+                    cache_invalidate(RATING_CACHE, user_id)
                     
                     await query.answer("✅ Post deleted successfully")
                     await query.message.edit_text(
@@ -4170,14 +4613,14 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 else:
                     await query.answer("❌ You can only delete your own posts", show_alert=True)
             except Exception as e:
-                logger.error(f"Error deleting post: {e}")
+                logger.error("Error deleting post: %s", e)
                 await query.answer("❌ Error deleting post", show_alert=True)
 
-        elif query.data.startswith("cancel_delete_post_"):
+        elif route == 'cancel_delete_post_':
             try:
-                parts = query.data.split('_')
-                post_id = int(parts[3])
-                from_page = int(parts[4]) if len(parts) > 4 else 1
+                post_part, _, page_part = arg.partition('_')
+                post_id = int(post_part)
+                from_page = int(page_part) if page_part else 1
                 
                 # Return to the post view
                 await view_post(update, context, post_id, from_page)
@@ -4186,26 +4629,26 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await show_previous_posts(update, context, 1)
 
         
-        elif query.data.startswith('reply_msg_'):
+        elif route == 'reply_msg_':
             # Handle private message reply button
             # The format is: reply_msg_<user_id>
             try:
                 # Extract everything after 'reply_msg_'
-                target_id = query.data[len('reply_msg_'):]
+                target_id = arg
                 
                 if not target_id or not target_id.isdigit():
-                    logger.error(f"Invalid target_id in reply_msg callback: {query.data}")
+                    logger.error("Invalid target_id in reply_msg callback: %s", query.data)
                     await query.answer("❌ Invalid user ID", show_alert=True)
                     return
                     
                 # Check if target user exists
-                target_user = db_fetch_one("SELECT anonymous_name FROM users WHERE user_id = %s", (target_id,))
+                target_user = await db_fetch_one("SELECT anonymous_name FROM users WHERE user_id = %s", (target_id,))
                 if not target_user:
                     await query.answer("❌ User not found", show_alert=True)
                     return
                 
                 # Set up the user to send a private message
-                db_execute(
+                await db_execute(
                     "UPDATE users SET waiting_for_private_message = TRUE, private_message_target = %s WHERE user_id = %s",
                     (target_id, user_id)
                 )
@@ -4219,19 +4662,19 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
                 
             except Exception as e:
-                logger.error(f"Error in reply_msg handler: {e}, data: {query.data}")
+                logger.error("Error in reply_msg handler: %s, data: %s", e, query.data)
                 await query.answer("❌ Error processing reply", show_alert=True)        
-        elif query.data.startswith("reply_"):
-            parts = query.data.split("_")
-            if len(parts) == 3:
-                post_id = int(parts[1])
-                comment_id = int(parts[2])
-                db_execute(
+        elif route == 'reply_':
+            parts = arg.split("_")
+            if len(parts) == 2:
+                post_id = int(parts[0])
+                comment_id = int(parts[1])
+                await db_execute(
                     "UPDATE users SET waiting_for_comment = TRUE, comment_post_id = %s, comment_idx = %s WHERE user_id = %s",
                     (post_id, comment_id, user_id)
                 )
                 
-                comment = db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
+                comment = await db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
                 preview_text = "Original comment not found"
                 if comment:
                     content = comment['content'][:100] + '...' if len(comment['content']) > 100 else comment['content']
@@ -4244,19 +4687,19 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     parse_mode=ParseMode.HTML  # Changed to HTML
                 )
                 
-        elif query.data.startswith("replytoreply_"):
-            parts = query.data.split("_")
-            if len(parts) == 4:
-                post_id = int(parts[1])
-                # parts[2] is the immediate parent id (not needed for storage)
-                comment_id = int(parts[3])   # this is the comment/reply the user is replying TO
+        elif route == 'replytoreply_':
+            parts = arg.split("_")
+            if len(parts) == 3:
+                post_id = int(parts[0])
+                # parts[1] is the immediate parent id (not needed for storage)
+                comment_id = int(parts[2])   # this is the comment/reply the user is replying TO
                 # Store the exact comment id being replied to in comment_idx
-                db_execute(
+                await db_execute(
                     "UPDATE users SET waiting_for_comment = TRUE, comment_post_id = %s, comment_idx = %s WHERE user_id = %s",
                     (post_id, comment_id, user_id)
                 )
         
-                comment = db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
+                comment = await db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
                 preview_text = "Original reply not found"
                 if comment:
                     content = comment['content'][:100] + '...' if len(comment['content']) > 100 else comment['content']
@@ -4269,90 +4712,48 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     parse_mode=ParseMode.HTML  # Changed to HTML
                 )
         # UPDATED: Handle Previous Posts pagination
-        elif query.data.startswith('show_more_replies_'):
+        elif route == 'show_more_replies_':
             try:
-                parts = query.data.split('_')
-                comment_id = int(parts[3])
-                page = int(parts[4])
+                comment_part, _, page_part = arg.partition('_')
+                comment_id = int(comment_part)
+                page = int(page_part)
                 await show_more_replies(update, context, comment_id, page)
             except (IndexError, ValueError) as e:
-                logger.error(f"Error parsing show_more_replies: {e}")
+                logger.error("Error parsing show_more_replies: %s", e)
                 await query.answer("❌ Error loading more replies", show_alert=True)
-        elif query.data.startswith("previous_posts_"):
-            try:
-                page = int(query.data.split('_')[2])
-                await show_previous_posts(update, context, page)
-            except (IndexError, ValueError):
-                await show_previous_posts(update, context, 1)
-
-        # UPDATED: Handle Previous Posts button
-        elif query.data == 'my_content_menu':
-            await show_my_content_menu(update, context)
+        elif route == 'previous_posts_':
+            await show_previous_posts(update, context, _parse_int(arg, 1))
 
-        elif query.data.startswith("my_posts_"):
+        elif route == 'my_posts_':
             await query.answer()
             await typing_animation(context, query.message.chat_id, 0.3)
-            try:
-                page = int(query.data.split('_')[2])
-                await show_previous_posts(update, context, page)
-            except (IndexError, ValueError):
-                await show_previous_posts(update, context, 1)
-
-        elif query.data == 'my_posts':
-            await show_previous_posts(update, context, 1)
+            await show_previous_posts(update, context, _parse_int(arg, 1))
 
-        elif query.data.startswith("viewpost_"):
+        elif route == 'viewpost_':
             await query.answer()
             await typing_animation(context, query.message.chat_id, 0.3)
             try:
-                parts = query.data.split('_')
-                if len(parts) >= 3:
-                    post_id = int(parts[1])
-                    from_page = int(parts[2])
-                    await view_post(update, context, post_id, from_page)
-                else:
-                    post_id = int(parts[1])
-                    await view_post(update, context, post_id, 1)
+                post_part, _, page_part = arg.partition('_')
+                post_id = int(post_part)
+                from_page = int(page_part) if page_part else 1
+                await view_post(update, context, post_id, from_page)
             except (IndexError, ValueError) as e:
-                logger.error(f"Error parsing viewpost callback: {e}")
+                logger.error("Error parsing viewpost callback: %s", e)
                 await query.answer("❌ Error loading post", show_alert=True)
 
-        elif query.data.startswith('my_comments_'):
+        elif route == 'my_comments_':
             await query.answer()
             await typing_animation(context, query.message.chat_id, 0.3)
-            try:
-                page = int(query.data.split('_')[2])
-                await show_my_comments(update, context, page)
-            except (IndexError, ValueError):
-                await show_my_comments(update, context, 1)
-        
-        elif query.data == 'my_comments':
-            await show_my_comments(update, context, 1)
-
-        # NEW: Handle My Content Menu
-        elif query.data == 'my_content_menu':
-            await show_my_content_menu(update, context)
-        
-        # NEW: Handle My Comments pagination
-        elif query.data.startswith('my_comments_'):
-            try:
-                page = int(query.data.split('_')[2])
-                await show_my_comments(update, context, page)
-            except (IndexError, ValueError):
-                await show_my_comments(update, context, 1)
-        
-        # NEW: Handle My Comments button
-        elif query.data == 'my_comments':
-            await show_my_comments(update, context, 1)
+            await show_my_comments(update, context, _parse_int(arg, 1))
         
         # NEW: Handle view comment details
-        elif query.data.startswith('view_comment_'):
+        elif route == 'view_comment_':
             try:
-                comment_id = int(query.data.split('_')[2])
-                comment = db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
+                comment_id = int(arg)
+                comment = await db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
                 
                 if comment and comment['author_id'] == user_id:
-                    post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (comment['post_id'],))
+                    post = await get_post(comment['post_id'])
                     
                     if post:
                         keyboard = [
@@ -4367,8 +4768,8 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         
                         text = (
                             f"💬 *Comment Details*\n\n"
-                            f"📄 **Post:** {escape_markdown(post_preview, version=2)}\n\n"
-                            f"🗨 **Your Comment:**\n{escape_markdown(comment_preview, version=2)}\n\n"
+                            f"📄 **Post:** {escape_markdown_v2(post_preview)}\n\n"
+                            f"🗨 **Your Comment:**\n{escape_markdown_v2(comment_preview)}\n\n"
                             f"📅 **Posted on:** {comment['timestamp'].strftime('%Y-%m-%d %H:%M') if not isinstance(comment['timestamp'], str) else comment['timestamp'][:16]}"
                         )
                         
@@ -4380,31 +4781,31 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 else:
                     await query.answer("❌ Comment not found or not yours", show_alert=True)
             except Exception as e:
-                logger.error(f"Error viewing comment: {e}")
+                logger.error("Error viewing comment: %s", e)
                 await query.answer("❌ Error viewing comment", show_alert=True)
 
         # UPDATED: Handle continue post (threading) - renamed from elaborate
-        elif query.data.startswith("continue_post_"):
-            post_id = int(query.data.split('_')[2])
-            post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+        elif route == 'continue_post_':
+            post_id = int(arg)
+            post = await get_post(post_id)
             
             if post and post['author_id'] == user_id:
                 context.user_data['thread_from_post_id'] = post_id
                 await query.message.reply_text(
                     "📚 *Choose a category for your continuation:*",
-                    reply_markup=build_category_buttons(),
+                    reply_markup=CATEGORY_MARKUP,
                     parse_mode=ParseMode.MARKDOWN
                 )
             else:
                 await query.answer("❌ You can only continue your own posts", show_alert=True)
         
-        elif query.data.startswith("replypage_"):
-            parts = query.data.split("_")
-            if len(parts) == 5:
-                post_id = int(parts[1])
-                comment_id = int(parts[2])
-                reply_page = int(parts[3])
-                comment_page = int(parts[4])
+        elif route == 'replypage_':
+            parts = arg.split("_")
+            if len(parts) == 4:
+                post_id = int(parts[0])
+                comment_id = int(parts[1])
+                reply_page = int(parts[2])
+                comment_page = int(parts[3])
                 await show_comments_page(update, context, post_id, comment_page, reply_pages={comment_id: reply_page})
             return
 
@@ -4437,7 +4838,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 # Edit based on message type
                 try:
                     await query.message.edit_text(
-                        f"✏️ *Edit your post:*\n\n{escape_markdown(pending_post['content'], version=2)}\n\nPlease type your edited post:",
+                        f"✏️ *Edit your post:*\n\n{escape_markdown_v2(pending_post['content'])}\n\nPlease type your edited post:",
                         reply_markup=InlineKeyboardMarkup([
                             [InlineKeyboardButton("❌ Cancel", callback_data='cancel_input')]
                         ]),
@@ -4446,7 +4847,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 except BadRequest:
                     # If it's a media message, edit the caption
                     await query.message.edit_caption(
-                        caption=f"✏️ *Edit your post:*\n\n{escape_markdown(pending_post['content'], version=2)}\n\nPlease type your edited post:",
+                        caption=f"✏️ *Edit your post:*\n\n{escape_markdown_v2(pending_post['content'])}\n\nPlease type your edited post:",
                         reply_markup=InlineKeyboardMarkup([
                             [InlineKeyboardButton("❌ Cancel", callback_data='cancel_input')]
                         ]),
@@ -4497,19 +4898,19 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 media_id = pending_post.get('media_id')
                 thread_from_post_id = pending_post.get('thread_from_post_id')
                 
-                # Insert post with thread reference if available
-                if thread_from_post_id:
-                    post_row = db_execute(
-                        "INSERT INTO posts (content, author_id, category, media_type, media_id, thread_from_post_id) VALUES (%s, %s, %s, %s, %s, %s) RETURNING post_id",
-                        (post_content, user_id, category, media_type, media_id, thread_from_post_id),
-                        fetchone=True
-                    )
-                else:
-                    post_row = db_execute(
-                        "INSERT INTO posts (content, author_id, category, media_type, media_id) VALUES (%s, %s, %s, %s, %s) RETURNING post_id",
-                        (post_content, user_id, category, media_type, media_id),
-                        fetchone=True
+                # Insert post (thread reference is NULL when not continuing a thread) and read back
+                # what the admin notification needs in the same round trip
+                post_row = await db_execute('''
+                    WITH ins AS (
+                        INSERT INTO posts (content, author_id, category, media_type, media_id, thread_from_post_id)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        RETURNING post_id, content, author_id
                     )
+                    SELECT ins.post_id, ins.content, u.anonymous_name
+                    FROM ins LEFT JOIN users u ON u.user_id = ins.author_id
+                ''', (post_content, user_id, category, media_type, media_id, thread_from_post_id or None),
+                    fetchone=True
+                )
                 
                 # Clean up user data
                 if 'pending_post' in context.user_data:
@@ -4521,7 +4922,10 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 
                 if post_row:
                     post_id = post_row['post_id']
-                    await notify_admin_of_new_post(context, post_id)
+                    # The author shouldn't wait on the admin's Telegram round trip
+                    context.application.create_task(
+                        notify_admin_of_new_post(context, post_id, post=post_row, author_name=get_display_name(post_row))
+                    )
                     
                     # Replace loading with success animation
                     try:
@@ -4531,16 +4935,15 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     
                     await asyncio.sleep(1)
                     
-                    keyboard = [[InlineKeyboardButton("📱 Main Menu", callback_data='menu')]]
                     try:
                         await success_msg.edit_text(
                             "✅ Your post has been submitted for admin approval!\nYou'll be notified when it's approved and published.",
-                            reply_markup=InlineKeyboardMarkup(keyboard)
+                            reply_markup=BACK_TO_MENU_MARKUP
                         )
                     except:
                         await success_msg.edit_caption(
                             "✅ Your post has been submitted for admin approval!\nYou'll be notified when it's approved and published.",
-                            reply_markup=InlineKeyboardMarkup(keyboard)
+                            reply_markup=BACK_TO_MENU_MARKUP
                         )
                 else:
                     try:
@@ -4548,112 +4951,87 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     except:
                         await loading_msg.edit_caption("❌ Failed to submit post. Please try again.")
                 return
-        elif query.data == 'admin_panel':
-            await admin_panel(update, context)
-            
-        elif query.data == 'admin_pending':
-            await show_pending_posts(update, context)
-            
-        elif query.data == 'admin_stats':
-            await show_admin_stats(update, context)
-            
-        elif query.data.startswith('approve_post_'):
+        elif route == 'approve_post_':
             try:
-                post_id = int(query.data.split('_')[-1])
-                logger.info(f"Admin {user_id} approving post {post_id}")
+                post_id = int(arg)
+                logger.info("Admin %s approving post %s", user_id, post_id)
                 await approve_post(update, context, post_id)
             except ValueError:
                 await query.answer("❌ Invalid post ID", show_alert=True)
             except Exception as e:
-                logger.error(f"Error in approve_post handler: {e}")
+                logger.error("Error in approve_post handler: %s", e)
                 await query.answer("❌ Error approving post", show_alert=True)
         # Admin broadcast handlers
-        elif query.data == 'admin_broadcast':
-            await start_broadcast(update, context)
-            
-        elif query.data.startswith('broadcast_'):
+        elif route == 'broadcast_':
             # Handle broadcast type selection
-            broadcast_type = query.data.split('_', 1)[1]
+            broadcast_type = arg
             await handle_broadcast_type(update, context, broadcast_type)
             
-        elif query.data == 'execute_broadcast':
-            await execute_broadcast(update, context)    
-                
-        elif query.data.startswith('reject_post_'):
+        elif route == 'reject_post_':
             try:
-                post_id = int(query.data.split('_')[-1])
-                logger.info(f"Admin {user_id} rejecting post {post_id}")
+                post_id = int(arg)
+                logger.info("Admin %s rejecting post %s", user_id, post_id)
                 await reject_post(update, context, post_id)
             except ValueError:
                 await query.answer("❌ Invalid post ID", show_alert=True)
             except Exception as e:
-                logger.error(f"Error in reject_post handler: {e}")
+                logger.error("Error in reject_post handler: %s", e)
                 await query.answer("❌ Error rejecting post", show_alert=True)                                  
         
-        elif query.data == 'inbox':
-            await show_inbox(update, context, 1)
-            
-        elif query.data.startswith('inbox_page_'):
-            try:
-                page = int(query.data.split('_')[2])
-                await show_inbox(update, context, page)
-            except (IndexError, ValueError):
-                await show_inbox(update, context, 1)
+        elif route == 'inbox_page_':
+            await show_inbox(update, context, _parse_int(arg, 1))
                 
-        elif query.data.startswith('view_message_'):
+        elif route == 'view_message_':
             try:
-                parts = query.data.split('_')
-                if len(parts) >= 3:
-                    message_id = int(parts[2])
-                    from_page = int(parts[3]) if len(parts) > 3 else 1
+                message_part, _, page_part = arg.partition('_')
+                if message_part:
+                    message_id = int(message_part)
+                    from_page = int(page_part) if page_part else 1
                     await view_individual_message(update, context, message_id, from_page)
             except (IndexError, ValueError) as e:
-                logger.error(f"Error parsing view_message: {e}")
+                logger.error("Error parsing view_message: %s", e)
                 await query.answer("❌ Error loading message", show_alert=True)
                 
-        elif query.data == 'mark_all_read':
-            await mark_all_read(update, context)
-            
-        elif query.data.startswith('delete_message_'):
+        elif route == 'delete_message_':
             try:
-                parts = query.data.split('_')
-                if len(parts) >= 3:
-                    message_id = int(parts[2])
-                    from_page = int(parts[3]) if len(parts) > 3 else 1
+                message_part, _, page_part = arg.partition('_')
+                if message_part:
+                    message_id = int(message_part)
+                    from_page = int(page_part) if page_part else 1
                     await delete_message(update, context, message_id, from_page)
             except (IndexError, ValueError) as e:
-                logger.error(f"Error parsing delete_message: {e}")
+                logger.error("Error parsing delete_message: %s", e)
                 await query.answer("❌ Error", show_alert=True)
                 
-        elif query.data.startswith('confirm_delete_message_'):
+        elif route == 'confirm_delete_message_':
             try:
-                parts = query.data.split('_')
-                if len(parts) >= 4:
-                    message_id = int(parts[3])
-                    from_page = int(parts[4]) if len(parts) > 4 else 1
+                message_part, _, page_part = arg.partition('_')
+                if message_part:
+                    message_id = int(message_part)
+                    from_page = int(page_part) if page_part else 1
                     await confirm_delete_message(update, context, message_id, from_page)
             except (IndexError, ValueError) as e:
-                logger.error(f"Error parsing confirm_delete: {e}")
+                logger.error("Error parsing confirm_delete: %s", e)
                 await query.answer("❌ Error", show_alert=True)
                 
-        elif query.data.startswith('cancel_delete_message_'):
+        elif route == 'cancel_delete_message_':
             try:
-                parts = query.data.split('_')
-                if len(parts) >= 4:
-                    message_id = int(parts[3])
-                    from_page = int(parts[4]) if len(parts) > 4 else 1
+                message_part, _, page_part = arg.partition('_')
+                if message_part:
+                    message_id = int(message_part)
+                    from_page = int(page_part) if page_part else 1
                     await view_individual_message(update, context, message_id, from_page)
             except (IndexError, ValueError):
                 await show_inbox(update, context, 1)
             
-        elif query.data.startswith('message_'):
-            target_id = query.data.split('_', 1)[1]
-            db_execute(
+        elif route == 'message_':
+            target_id = arg
+            await db_execute(
                 "UPDATE users SET waiting_for_private_message = TRUE, private_message_target = %s WHERE user_id = %s",
                 (target_id, user_id)
             )
             
-            target_user = db_fetch_one("SELECT anonymous_name FROM users WHERE user_id = %s", (target_id,))
+            target_user = await db_fetch_one("SELECT anonymous_name FROM users WHERE user_id = %s", (target_id,))
             target_name = target_user['anonymous_name'] if target_user else "this user"
             
             await query.message.reply_text(
@@ -4668,15 +5046,12 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         elif query.data == 'refresh_mini_app':
             await query.answer("Refreshing...")
             await mini_app_command(update, context)
-        elif query.data.startswith("viewpost_"):
-            post_id = int(query.data.split('_')[1])
-            await view_post(update, context, post_id)    
-        elif query.data.startswith('block_user_'):
-            target_id = query.data.split('_', 2)[2]
+        elif route == 'block_user_':
+            target_id = arg
             
             # Add to blocks table
             try:
-                db_execute(
+                await db_execute(
                     "INSERT INTO blocks (blocker_id, blocked_id) VALUES (%s, %s)",
                     (user_id, target_id)
                 )
@@ -4684,8 +5059,8 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             except psycopg2.IntegrityError:
                 await query.message.reply_text("❌ User is already blocked.")
             
-    except Exception as e:
-        logger.error(f"Error in button_handler: {e}")
+    except Exception:
+        log_exception_throttled("button_handler failed for callback %s", query.data)
         try:
             await query.message.reply_text("❌ An error occurred. Please try again.")
         except:
@@ -4693,15 +5068,14 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def show_admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
-    user = db_fetch_one("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-    if not user or not user['is_admin']:
+    if not await is_admin_user(user_id):
         if update.message:
             await update.message.reply_text("❌ You don't have permission to access this.")
         elif update.callback_query:
             await update.callback_query.message.reply_text("❌ You don't have permission to access this.")
         return
     
-    stats = db_fetch_one('''
+    stats = await db_fetch_one('''
         SELECT 
             (SELECT COUNT(*) FROM users) as total_users,
             (SELECT COUNT(*) FROM posts WHERE approved = TRUE) as approved_posts,
@@ -4737,16 +5111,107 @@ async def show_admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parse_mode=ParseMode.MARKDOWN
             )
     except Exception as e:
-        logger.error(f"Error showing admin stats: {e}")
+        logger.error("Error showing admin stats: %s", e)
         if update.message:
             await update.message.reply_text("❌ Error loading statistics.")
         elif update.callback_query:
             await update.callback_query.message.reply_text("❌ Error loading statistics.")
 
+# 💬 Comment write batching - comments that arrive while a flush is running go out together in
+# the next one, so a surge costs one INSERT per batch and a quiet bot adds no delay at all
+COMMENT_BATCH_MAX = 200
+
+# Insert the comments and reset each author's comment-input state in one statement
+COMMENT_INSERT_BATCH_SQL = """
+    WITH data (post_id, parent_comment_id, author_id, content, type, file_id) AS (VALUES %s),
+    ins AS (
+        INSERT INTO comments (post_id, parent_comment_id, author_id, content, type, file_id)
+        SELECT post_id, parent_comment_id, author_id, content, type, file_id FROM data
+        RETURNING comment_id
+    ), reset AS (
+        UPDATE users SET waiting_for_comment = FALSE, comment_post_id = NULL, comment_idx = NULL, reply_idx = NULL
+        WHERE user_id IN (SELECT author_id FROM data)
+    )
+    SELECT comment_id FROM ins
+"""
+COMMENT_INSERT_TEMPLATE = "(%s::integer, %s::integer, %s, %s, %s, %s)"
+
+_pending_comments = []
+_comment_flusher = None
+
+async def insert_comment(row):
+    """Queue (post_id, parent_comment_id, author_id, content, type, file_id); True once committed"""
+    global _comment_flusher
+    future = asyncio.get_running_loop().create_future()
+    _pending_comments.append((row, future))
+    if _comment_flusher is None or _comment_flusher.done():
+        _comment_flusher = asyncio.create_task(_flush_comments())
+    return await future
+
+async def _flush_comments():
+    while _pending_comments:
+        batch = _pending_comments[:COMMENT_BATCH_MAX]
+        del _pending_comments[:len(batch)]
+        rows = [row for row, _ in batch]
+        try:
+            inserted = await db_execute_values(COMMENT_INSERT_BATCH_SQL, rows, COMMENT_INSERT_TEMPLATE)
+            if inserted is not None and len(inserted) == len(rows):
+                results = [True] * len(rows)
+            else:
+                # The batch is all-or-nothing; retry row by row so one bad row (e.g. its post was
+                # deleted meanwhile) doesn't fail everyone else's comment
+                results = await asyncio.gather(*(
+                    db_execute_values(COMMENT_INSERT_BATCH_SQL, [row], COMMENT_INSERT_TEMPLATE) for row in rows
+                ))
+                results = [bool(inserted) for inserted in results]
+        except Exception as e:
+            logger.error("Error flushing %s comments: %s", len(rows), e)
+            results = [False] * len(rows)
+        for (_, future), saved in zip(batch, results):
+            if not future.done():
+                future.set_result(saved)
+
+MENU_HELP_TEXT = (
+    "ℹ️ *How to Use This Bot:*\n"
+    "• Use the menu buttons to navigate.\n"
+    "• Tap 'Share My Thoughts' to share your thoughts anonymously.\n"
+    "• Choose a category and type or send your message (text, photo, or voice).\n"
+    "• After posting, others can comment on your posts.\n"
+    "• View your profile, set your name and sex anytime.\n"
+    "• Use 'My Previous Posts' to view and continue your past posts.\n"
+    "• Use the comments button on channel posts to join the conversation here.\n"
+    "• Follow users to send them private messages."
+)
+
+# Reply-keyboard buttons; looked up by exact message text
+MENU_HANDLERS = {
+    "🌟 Share My Thoughts": lambda update, context: update.message.reply_text(
+        "📚 *Choose a category:*", reply_markup=CATEGORY_MARKUP, parse_mode=ParseMode.MARKDOWN
+    ),
+    "👤 View Profile": lambda update, context: send_updated_profile(
+        str(update.effective_user.id), update.message.chat.id, context
+    ),
+    "🏆 Leaderboard": lambda update, context: show_leaderboard(update, context),
+    "⚙️ Settings": lambda update, context: show_settings(update, context),
+    "📚 My Previous Posts": lambda update, context: show_my_content_menu(update, context),
+    "❓ Help": lambda update, context: update.message.reply_text(MENU_HELP_TEXT, parse_mode=ParseMode.MARKDOWN),
+    "🌐 Web App": lambda update, context: mini_app_command(update, context),
+}
+# context.user_data flags whose handlers below must see the text even if it matches a menu button
+MENU_BYPASS_BLOCKERS = ('editing_comment', 'editing_post', 'broadcasting')
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text or update.message.caption or ""
+    
+    # Menu buttons don't need the pending-input flags (input states swap the keyboard for
+    # cancel_menu), so skip the user-row round-trip unless an in-context edit/broadcast is pending
+    menu_handler = MENU_HANDLERS.get(text)
+    if menu_handler and not any(key in context.user_data for key in MENU_BYPASS_BLOCKERS):
+        await menu_handler(update, context)
+        return
+    
     user_id = str(update.effective_user.id)
-    user = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (user_id,))
+    user = await get_or_create_user(user_id)
     
     # Handle cancel command from text
     if text.lower() in ["❌ cancel", "cancel", "/cancel"]:
@@ -4785,14 +5250,18 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # NEW: Handle comment editing
     if 'editing_comment' in context.user_data:
         comment_id = context.user_data['editing_comment']
-        comment = db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
+        # Ownership check and update back to back on one pooled connection
+        async with db_session():
+            comment = await db_fetch_one("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
+            can_edit = comment and comment['author_id'] == user_id and comment['type'] == 'text'
+            if can_edit:
+                await db_execute(
+                    "UPDATE comments SET content = %s WHERE comment_id = %s",
+                    (text, comment_id)
+                )
         
-        if comment and comment['author_id'] == user_id and comment['type'] == 'text':
-            # Update the comment
-            db_execute(
-                "UPDATE comments SET content = %s WHERE comment_id = %s",
-                (text, comment_id)
-            )
+        if can_edit:
+            cache_invalidate(COMMENT_RENDER_CACHE, comment_id)
             
             # Clean up
             del context.user_data['editing_comment']
@@ -4921,14 +5390,6 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     parse_mode=ParseMode.MARKDOWN
                 )
                 return
-    if not user:
-        anon = create_anonymous_name(user_id)
-        is_admin = str(user_id) == str(ADMIN_ID)
-        db_execute(
-            "INSERT INTO users (user_id, anonymous_name, sex, is_admin) VALUES (%s, %s, %s, %s)",
-            (user_id, anon, '👤', is_admin)
-        )
-        user = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (user_id,))
 
     # NEW: Check if we have a thread_from_post_id for continuation
     thread_from_post_id = context.user_data.get('thread_from_post_id')
@@ -4961,14 +5422,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     reply_markup=main_menu
                 )
                 # Reset state
-                db_execute(
+                await db_execute(
                     "UPDATE users SET waiting_for_post = FALSE, selected_category = NULL WHERE user_id = %s",
                     (user_id,)
                 )
                 return
             
             # FIX: Reset user state for BOTH text and media posts
-            db_execute(
+            await db_execute(
                 "UPDATE users SET waiting_for_post = FALSE, selected_category = NULL WHERE user_id = %s",
                 (user_id,)
             )
@@ -4977,13 +5438,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await send_post_confirmation(update, context, post_content, category, media_type, media_id, thread_from_post_id=thread_from_post_id)
             return
         except Exception as e:
-            logger.error(f"Error reading media: {e}")
+            logger.error("Error reading media: %s", e)
             await update.message.reply_text(
                 "❌ Error processing your media. Please try again.",
                 reply_markup=main_menu
             )
             # Reset state on error
-            db_execute(
+            await db_execute(
                 "UPDATE users SET waiting_for_post = FALSE, selected_category = NULL WHERE user_id = %s",
                 (user_id,)
             )
@@ -5030,81 +5491,82 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("❌ Unsupported comment type. Please send text, voice, GIF, sticker, or photo.")
             return
     
-        # Insert new comment
-        comment_row = db_execute(
-            """INSERT INTO comments 
-            (post_id, parent_comment_id, author_id, content, type, file_id) 
-            VALUES (%s, %s, %s, %s, %s, %s) RETURNING comment_id""",
-            (post_id, parent_comment_id, user_id, content, comment_type, file_id),
-            fetchone=True
-        )
-    
-        # Reset state
-        db_execute(
-            "UPDATE users SET waiting_for_comment = FALSE, comment_post_id = NULL, comment_idx = NULL, reply_idx = NULL WHERE user_id = %s",
-            (user_id,)
-        )
-    
-        await update.message.reply_text("✅ Your comment has been posted!", reply_markup=main_menu)
-        
-        # Update comment count
-        await update_channel_post_comment_count(context, post_id)
-        
-        # Notify parent comment author if this is a reply
+        # Insert new comment and reset state, batched with any other comments arriving meanwhile
+        comment_saved = await insert_comment((post_id, parent_comment_id, user_id, content, comment_type, file_id))
+        if not comment_saved:
+            # The failed insert rolled back its state reset too, so clear the comment state on its own
+            await db_execute(
+                "UPDATE users SET waiting_for_comment = FALSE, comment_post_id = NULL, comment_idx = NULL, reply_idx = NULL "
+                "WHERE user_id = %s",
+                (user_id,)
+            )
+            await update.message.reply_text(
+                "❌ Error posting your comment. Please try again.",
+                reply_markup=main_menu
+            )
+            return
+        cache_invalidate(POST_CACHE, post_id)
+        cache_invalidate(RATING_CACHE, user_id)
+    
+        # Confirmation, channel comment count and (for replies) the parent author's notice are
+        # independent, so their round trips overlap instead of running back to back
+        follow_ups = [
+            update.message.reply_text("✅ Your comment has been posted!", reply_markup=main_menu),
+            update_channel_post_comment_count(context, post_id)
+        ]
         if parent_comment_id != 0:
-            await notify_user_of_reply(context, post_id, parent_comment_id, user_id)
+            follow_ups.append(notify_user_of_reply(context, post_id, parent_comment_id, user_id))
+        await asyncio.gather(*follow_ups)
         return
 
     elif user and user['waiting_for_private_message']:
         target_id = user['private_message_target']
         message_content = text
         
-        # Check if blocked
-        is_blocked = db_fetch_one(
-            "SELECT * FROM blocks WHERE blocker_id = %s AND blocked_id = %s",
-            (target_id, user_id)
+        # Block check, save (only if not blocked) and state reset in one round-trip
+        message_row = await db_execute(
+            """WITH blocked AS (
+                SELECT EXISTS (
+                    SELECT 1 FROM blocks WHERE blocker_id = %(target_id)s AND blocked_id = %(user_id)s
+                ) AS is_blocked
+            ), ins AS (
+                INSERT INTO private_messages (sender_id, receiver_id, content)
+                SELECT %(user_id)s, %(target_id)s, %(content)s FROM blocked WHERE NOT is_blocked
+                RETURNING message_id
+            ), reset AS (
+                UPDATE users SET waiting_for_private_message = FALSE, private_message_target = NULL WHERE user_id = %(user_id)s
+            )
+            SELECT blocked.is_blocked, (SELECT message_id FROM ins) AS message_id FROM blocked""",
+            {'user_id': user_id, 'target_id': target_id, 'content': message_content},
+            fetchone=True
         )
         
-        if is_blocked:
+        if message_row and message_row['is_blocked']:
             await update.message.reply_text(
                 "❌ You cannot send messages to this user. They have blocked you.",
                 reply_markup=main_menu
             )
-            db_execute(
-                "UPDATE users SET waiting_for_private_message = FALSE, private_message_target = NULL WHERE user_id = %s",
-                (user_id,)
-            )
             return
         
-        # Save message
-        message_row = db_execute(
-            "INSERT INTO private_messages (sender_id, receiver_id, content) VALUES (%s, %s, %s) RETURNING message_id",
-            (user_id, target_id, message_content),
-            fetchone=True
-        )
-        
-        # Reset state
-        db_execute(
-            "UPDATE users SET waiting_for_private_message = FALSE, private_message_target = NULL WHERE user_id = %s",
-            (user_id,)
-        )
-        
-        # Notify receiver
-        await notify_user_of_private_message(context, user_id, target_id, message_content, message_row['message_id'] if message_row else None)
-        
-        await update.message.reply_text(
-            "✅ Your message has been sent!",
-            reply_markup=main_menu
+        # Notify receiver while confirming to the sender
+        await asyncio.gather(
+            notify_user_of_private_message(context, user_id, target_id, message_content, message_row['message_id'] if message_row else None),
+            update.message.reply_text(
+                "✅ Your message has been sent!",
+                reply_markup=main_menu
+            )
         )
         return
 
     if user and user['awaiting_name']:
         new_name = text.strip()
         if new_name and len(new_name) <= 30:
-            db_execute(
+            await db_execute(
                 "UPDATE users SET anonymous_name = %s, awaiting_name = FALSE WHERE user_id = %s",
                 (new_name, user_id)
             )
+            cache_invalidate(USER_PROFILE_CACHE, user_id)
+            cache_clear(COMMENT_RENDER_CACHE)
             await update.message.reply_text(f"✅ Name updated to *{new_name}*!", parse_mode=ParseMode.MARKDOWN)
             await send_updated_profile(user_id, update.message.chat.id, context)
         else:
@@ -5112,47 +5574,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Handle main menu buttons
-    if text == "🌟 Share My Thoughts":
-        await update.message.reply_text(
-            "📚 *Choose a category:*",
-            reply_markup=build_category_buttons(),
-            parse_mode=ParseMode.MARKDOWN
-        )
-        return 
-
-    elif text == "👤 View Profile":
-        await send_updated_profile(user_id, update.message.chat.id, context)
-        return 
-
-    elif text == "🏆 Leaderboard":
-        await show_leaderboard(update, context)
-        return
-
-    elif text == "⚙️ Settings":
-        await show_settings(update, context)
-        return
-
-    elif text == "📚 My Previous Posts":
-        await show_my_content_menu(update, context)  # Show menu instead of direct posts
-        return
-
-    elif text == "❓ Help":
-        help_text = (
-            "ℹ️ *How to Use This Bot:*\n"
-            "• Use the menu buttons to navigate.\n"
-            "• Tap 'Share My Thoughts' to share your thoughts anonymously.\n"
-            "• Choose a category and type or send your message (text, photo, or voice).\n"
-            "• After posting, others can comment on your posts.\n"
-            "• View your profile, set your name and sex anytime.\n"
-            "• Use 'My Previous Posts' to view and continue your past posts.\n"
-            "• Use the comments button on channel posts to join the conversation here.\n"
-            "• Follow users to send them private messages."
-        )
-        await update.message.reply_text(help_text, parse_mode=ParseMode.MARKDOWN)
-        return
-
-    elif text == "🌐 Web App":
-        await mini_app_command(update, context)
+    if menu_handler:
+        await menu_handler(update, context)
         return
 
     # If none of the above, show main menu
@@ -5160,60 +5583,15 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "How can I help you?",
         reply_markup=main_menu
     )
-async def handle_private_message_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = str(update.effective_user.id)
-    text = update.message.text
-
-    user = db_fetch_one(
-        "SELECT waiting_for_private_message, private_message_target FROM users WHERE user_id = %s",
-        (user_id,)
-    )
-
-    if not user or not user["waiting_for_private_message"]:
-        return  # Not replying to a private message
-
-    receiver_id = user["private_message_target"]
-
-    # Prevent sending message to self
-    if receiver_id == user_id:
-        await update.message.reply_text("❌ You cannot message yourself.")
-        return
-
-    # Save message
-    msg = db_execute(
-        """
-        INSERT INTO private_messages (sender_id, receiver_id, content)
-        VALUES (%s, %s, %s)
-        RETURNING message_id
-        """,
-        (user_id, receiver_id, text),
-        fetchone=True
-    )
-
-    # Reset reply state
-    db_execute(
-        """
-        UPDATE users
-        SET waiting_for_private_message = FALSE,
-            private_message_target = NULL
-        WHERE user_id = %s
-        """,
-        (user_id,)
-    )
-
-    # Notify receiver
-    await notify_user_of_private_message(
-        context,
-        sender_id=user_id,
-        receiver_id=receiver_id,
-        message_content=text,
-        message_id=msg["message_id"]
-    )
-
-    await update.message.reply_text("✅ Message sent!")
+async def close_db_resources(app):
+    """post_shutdown hook: stop the DB executor and close pooled connections"""
+    DB_EXECUTOR.shutdown(wait=True)
+    if db_pool and not db_pool.closed:
+        db_pool.closeall()
+        logger.info("✅ Database connections closed")
 
 async def error_handler(update, context):
-    logger.error(f"Update {update} caused error: {context.error}", exc_info=True) 
+    logger.error("Update %s caused error: %s", update, context.error, exc_info=True) 
 
 from telegram import BotCommand 
 
@@ -5231,7 +5609,7 @@ async def set_bot_commands(app):
         BotCommand("inbox", "View your private messages"),
     ]
     
-    if ADMIN_ID:
+    if ADMIN_IDS:
         commands.append(BotCommand("admin", "Admin panel (admin only)"))
     
     await app.bot.set_my_commands(commands)
@@ -5290,11 +5668,32 @@ def main():
         # Assign vent numbers to existing posts
         assign_vent_numbers_to_existing_posts()
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
-        return
+        logger.error("Failed to initialize database: %s", e)
+        sys.exit(1)
+    
+    # Faster event loop where available (uvloop isn't built for Windows)
+    try:
+        import uvloop
+        uvloop.install()
+        logger.info("Using uvloop event loop")
+    except ImportError:
+        pass
     
     # Create and run Telegram bot
-    app = Application.builder().token(TOKEN).post_init(set_bot_commands).build()
+    app = (
+        Application.builder()
+        .token(TOKEN)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        # Every Bot API call is paced under Telegram's flood limits and retried on RetryAfter
+        .rate_limiter(AIORateLimiter(
+            overall_max_rate=TELEGRAM_MAX_RATE,
+            overall_time_period=1,
+            max_retries=TELEGRAM_MAX_RETRIES
+        ))
+        .post_init(set_bot_commands)
+        .post_shutdown(close_db_resources)
+        .build()
+    )
     
     # Add your handlers
     app.add_handler(CommandHandler("menu", menu))
@@ -5307,10 +5706,16 @@ def main():
     app.add_handler(CommandHandler("fixventnumbers", fix_vent_numbers))
     app.add_handler(CallbackQueryHandler(button_handler))
     app.add_handler(MessageHandler(filters.ALL & ~filters.COMMAND, handle_message))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_private_message_text))
     
     app.add_error_handler(error_handler)
     
+    # Watch DB pool pressure
+    app.job_queue.run_repeating(
+        sample_pool_stats,
+        interval=POOL_STATS_INTERVAL_SECONDS,
+        first=POOL_STATS_INTERVAL_SECONDS
+    )
+    
     # ==================== RAILWAY COMPATIBILITY ====================
     # Get PORT from environment (Railway provides this)
     port = int(os.environ.get("PORT", 5000))
@@ -5327,8 +5732,8 @@ def main():
     )
     flask_thread.start()
     
-    logger.info(f"✅ Flask health check server started on port {port}")
-    logger.info(f"✅ Bot is ready! Starting polling...")
+    logger.info("✅ Flask health check server started on port %s", port)
+    logger.info("✅ Bot is ready! Starting polling...")
     
     # Start polling
     app.run_polling(
@@ -6427,12 +6832,12 @@ def mini_app_submit_vent():
             return jsonify({'success': False, 'error': 'Content cannot be empty'}), 400
         
         # Check if user exists
-        user = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (user_id,))
+        user = db_fetch_one_sync("SELECT * FROM users WHERE user_id = %s", (user_id,))
         if not user:
             return jsonify({'success': False, 'error': 'User not found'}), 404
         
         # Insert the post (simple and clean)
-        post_row = db_execute(
+        post_row = db_execute_sync(
             "INSERT INTO posts (content, author_id, category, media_type, approved) VALUES (%s, %s, %s, 'text', FALSE) RETURNING post_id",
             (content, user_id, category),
             fetchone=True
@@ -6442,7 +6847,7 @@ def mini_app_submit_vent():
             post_id = post_row['post_id']
             
             # Log it (optional)
-            logger.info(f"📝 Mini App Post submitted: ID {post_id} by {user_id}")
+            logger.info("📝 Mini App Post submitted: ID %s by %s", post_id, user_id)
             
             return jsonify({
                 'success': True,
@@ -6453,33 +6858,33 @@ def mini_app_submit_vent():
             return jsonify({'success': False, 'error': 'Failed to create post'}), 500
             
     except Exception as e:
-        logger.error(f"Error in mini-app submit vent: {e}")
+        logger.error("Error in mini-app submit vent: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # Helper function for sync context (since Flask routes can't be async)
 def notify_admin_of_new_post_sync(post_id):
     """Sync version of notify_admin_of_new_post"""
     try:
-        if not ADMIN_ID:
+        if not ADMIN_IDS:
             return
         
-        post = db_fetch_one("SELECT * FROM posts WHERE post_id = %s", (post_id,))
+        post = db_fetch_one_sync("SELECT * FROM posts WHERE post_id = %s", (post_id,))
         if not post:
             return
         
-        author = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (post['author_id'],))
+        author = get_user_profile_sync(post['author_id'])
         author_name = get_display_name(author)
         
         post_preview = post['content'][:100] + '...' if len(post['content']) > 100 else post['content']
         
         # Create a simple text notification (in real app, you'd send via bot)
-        logger.info(f"🆕 Mini App Post awaiting approval from {author_name}: {post_preview}")
+        logger.info("🆕 Mini App Post awaiting approval from %s: %s", author_name, post_preview)
         
         # You could also send to a webhook or store in a queue for bot to process
         # For now, just log it
         
     except Exception as e:
-        logger.error(f"Error in sync admin notification: {e}")
+        logger.error("Error in sync admin notification: %s", e)
 
 @flask_app.route('/api/mini-app/get-posts', methods=['GET'])
 def mini_app_get_posts():
@@ -6490,7 +6895,7 @@ def mini_app_get_posts():
         offset = (page - 1) * per_page
         
         # Get approved posts WITH sex but WITHOUT name
-        posts = db_fetch_all('''
+        posts = db_fetch_all_sync('''
             SELECT 
                 p.post_id,
                 p.content,
@@ -6547,7 +6952,7 @@ def mini_app_get_posts():
             })
         
         # Get total count
-        total_posts = db_fetch_one("SELECT COUNT(*) as count FROM posts WHERE approved = TRUE")
+        total_posts = db_fetch_one_sync("SELECT COUNT(*) as count FROM posts WHERE approved = TRUE")
         
         return jsonify({
             'success': True,
@@ -6558,7 +6963,7 @@ def mini_app_get_posts():
         })
         
     except Exception as e:
-        logger.error(f"Error in mini-app get posts: {e}")
+        logger.error("Error in mini-app get posts: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @flask_app.route('/api/mini-app/leaderboard', methods=['GET'])
@@ -6566,17 +6971,7 @@ def mini_app_leaderboard():
     """API endpoint for leaderboard data"""
     try:
         # Get top 10 users
-        top_users = db_fetch_all('''
-            SELECT 
-                u.user_id,
-                u.anonymous_name,
-                u.sex,
-                (SELECT COUNT(*) FROM posts WHERE author_id = u.user_id AND approved = TRUE) + 
-                (SELECT COUNT(*) FROM comments WHERE author_id = u.user_id) AS total
-            FROM users u
-            ORDER BY total DESC
-            LIMIT 10
-        ''')
+        top_users = get_top_users() or []
         
         # Format users
         formatted_users = []
@@ -6595,31 +6990,31 @@ def mini_app_leaderboard():
         })
         
     except Exception as e:
-        logger.error(f"Error in mini-app leaderboard: {e}")
+        logger.error("Error in mini-app leaderboard: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @flask_app.route('/api/mini-app/profile/<user_id>', methods=['GET'])
 def mini_app_profile(user_id):
     """API endpoint for user profile"""
     try:
-        user = db_fetch_one("SELECT * FROM users WHERE user_id = %s", (user_id,))
+        user = db_fetch_one_sync("SELECT * FROM users WHERE user_id = %s", (user_id,))
         
         if not user:
             return jsonify({'success': False, 'error': 'User not found'}), 404
         
         rating = calculate_user_rating(user_id)
         
-        followers = db_fetch_one(
+        followers = db_fetch_one_sync(
             "SELECT COUNT(*) as count FROM followers WHERE followed_id = %s",
             (user_id,)
         )
         
-        posts = db_fetch_one(
+        posts = db_fetch_one_sync(
             "SELECT COUNT(*) as count FROM posts WHERE author_id = %s AND approved = TRUE",
             (user_id,)
         )
         
-        comments = db_fetch_one(
+        comments = db_fetch_one_sync(
             "SELECT COUNT(*) as count FROM comments WHERE author_id = %s",
             (user_id,)
         )
@@ -6641,7 +7036,7 @@ def mini_app_profile(user_id):
         })
         
     except Exception as e:
-        logger.error(f"Error in mini-app profile: {e}")
+        logger.error("Error in mini-app profile: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @flask_app.route('/api/mini-app/admin/pending-posts', methods=['GET'])
@@ -6651,7 +7046,7 @@ def mini_app_admin_pending_posts():
         # Check if admin (you'll need to implement proper authentication)
         # For now, we'll just return data
         
-        posts = db_fetch_all('''
+        posts = db_fetch_all_sync('''
             SELECT 
                 p.post_id,
                 p.content,
@@ -6672,7 +7067,7 @@ def mini_app_admin_pending_posts():
         })
         
     except Exception as e:
-        logger.error(f"Error in mini-app admin pending posts: {e}")
+        logger.error("Error in mini-app admin pending posts: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @flask_app.route('/api/mini-app/admin/approve-post', methods=['POST'])
@@ -6686,10 +7081,11 @@ def mini_app_admin_approve_post():
             return jsonify({'success': False, 'error': 'Post ID required'}), 400
         
         # Update the post to approved
-        success = db_execute(
+        success = db_execute_sync(
             "UPDATE posts SET approved = TRUE WHERE post_id = %s",
             (post_id,)
         )
+        cache_invalidate(POST_CACHE, int(post_id))
         
         if success:
             return jsonify({'success': True, 'message': 'Post approved'})
@@ -6697,7 +7093,7 @@ def mini_app_admin_approve_post():
             return jsonify({'success': False, 'error': 'Failed to approve post'}), 500
             
     except Exception as e:
-        logger.error(f"Error in mini-app approve post: {e}")
+        logger.error("Error in mini-app approve post: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @flask_app.route('/api/mini-app/admin/reject-post', methods=['POST'])
@@ -6711,10 +7107,8 @@ def mini_app_admin_reject_post():
             return jsonify({'success': False, 'error': 'Post ID required'}), 400
         
         # Delete the post
-        success = db_execute(
-            "DELETE FROM posts WHERE post_id = %s",
-            (post_id,)
-        )
+        success = db_execute_sync(DELETE_POST_CASCADE_SQL, {'post_id': post_id})
+        cache_invalidate(POST_CACHE, int(post_id))
         
         if success:
             return jsonify({'success': True, 'message': 'Post rejected and deleted'})
@@ -6722,23 +7116,8 @@ def mini_app_admin_reject_post():
             return jsonify({'success': False, 'error': 'Failed to reject post'}), 500
             
     except Exception as e:
-        logger.error(f"Error in mini-app reject post: {e}")
+        logger.error("Error in mini-app reject post: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 if __name__ == "__main__": 
-    # Initialize database first
-    try:
-        init_db()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
-        exit(1)
-    
-    # Start Flask server in a separate thread for Render
-    port = int(os.environ.get('PORT', 5000))
-    threading.Thread(
-        target=lambda: flask_app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False),
-        daemon=True
-    ).start()
-    
-    # Start Telegram bot in main thread
+    # main() initializes the database (once), starts the Flask thread and runs the bot
     main()